@@ -1,7 +1,6 @@
 import tkinter as tk
 from tkinter import messagebox, filedialog, simpledialog
 from tkinter import ttk
-import qrcode
 from PIL import Image, ImageTk, ImageDraw
 import io
 import sqlite3
@@ -10,62 +9,29 @@ from datetime import datetime
 import random
 import webbrowser
 import base64
-import csv
+from concurrent.futures import ThreadPoolExecutor
+from qr_engine import (foreground_colors, background_colors, qr_templates,
+                       build_payload, render_qr, rendered_size, add_logo, prepare_logo,
+                       resolve_error_correction)
+from qr_capacity import check_capacity, estimate_capacity
+from qr_vector import vector_formats, save_vector, vector_layout, is_transparent, color_fractions
+from qrcode.exceptions import DataOverflowError
+from qr_storage import (open_database, start_writer, queue_write, flush_writer, stop_writer,
+                        writer_info, fetch_history_page, list_tables, table_columns, fetch_table_page,
+                        fetch_rowids, table_row_count, in_place_tables, export_tables,
+                        analytics_by_type, analytics_by_day)
 try:
-    import cv2
-    from pyzbar.pyzbar import decode
-    import numpy as np
+    from qr_scanner import (start_scanner, stop_scanner, latest_codes, scanner_info, release_display_frame,
+                            verify_in_background)
     scanner_available = True
 except ImportError:
     scanner_available = False
 
 # Connect to SQLite database (it will create the database if it doesn't exist)
-conn = sqlite3.connect('user_data.db')  # Database file
+# and bring its schema up to date
+conn = open_database('user_data.db')  # Database file
 cursor = conn.cursor()
 
-# Create the users table if it doesn't already exist
-cursor.execute('''CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT UNIQUE,
-                    password TEXT)''')
-
-# Check if is_admin column exists, add it if it doesn't
-cursor.execute("PRAGMA table_info(users)")
-columns = [column[1] for column in cursor.fetchall()]
-if "is_admin" not in columns:
-    cursor.execute("ALTER TABLE users ADD COLUMN is_admin INTEGER DEFAULT 0")
-    conn.commit()
-
-# Create history table to store generated QR codes
-cursor.execute('''CREATE TABLE IF NOT EXISTS qr_history (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
-                    qr_type TEXT,
-                    content TEXT,
-                    created_at TEXT,
-                    FOREIGN KEY (user_id) REFERENCES users (id))''')
-
-# Create favorites table to store favorite QR code settings
-cursor.execute('''CREATE TABLE IF NOT EXISTS favorites (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
-                    name TEXT,
-                    fg_color TEXT,
-                    bg_color TEXT,
-                    box_size INTEGER,
-                    border_size INTEGER,
-                    error_level TEXT,
-                    pattern TEXT,
-                    FOREIGN KEY (user_id) REFERENCES users (id))''')
-
-# Create analytics table to track QR code usage
-cursor.execute('''CREATE TABLE IF NOT EXISTS analytics (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
-                    qr_type TEXT,
-                    created_at TEXT,
-                    FOREIGN KEY (user_id) REFERENCES users (id))''')
-
 # Check if admin user exists, if not create it
 cursor.execute("SELECT id FROM users WHERE username = ?", ("Admin",))
 admin_exists = cursor.fetchone()
@@ -74,103 +40,30 @@ if not admin_exists:
                   ("Admin", "RANPROJECT", 1))
     conn.commit()
 
-# Color dictionaries mapping names to hex codes
-foreground_colors = {
-    "Black": "#000000",
-    "Red": "#FF0000",
-    "Green": "#00AA00",
-    "Blue": "#0000FF",
-    "Purple": "#800080",
-    "Navy": "#000080",
-    "Teal": "#008080",
-    "Maroon": "#800000",
-    "Orange": "#FFA500",
-    "Brown": "#A52A2A",
-    "Magenta": "#FF00FF",
-    "Gold": "#FFD700",
-    "Crimson": "#DC143C",
-    "Forest Green": "#228B22",
-    "Royal Blue": "#4169E1"
-}
-
-background_colors = {
-    "White": "#FFFFFF",
-    "Light Gray": "#F0F0F0",
-    "Light Pink": "#FFE0E0",
-    "Light Green": "#E0FFE0",
-    "Light Blue": "#E0E0FF",
-    "Light Yellow": "#FFFFC0",
-    "Light Cyan": "#C0FFFF",
-    "Light Purple": "#FFE0FF",
-    "Beige": "#F5F5DC",
-    "Mint": "#F5FFFA",
-    "Lavender": "#E6E6FA",
-    "Ivory": "#FFFFF0",
-    "Cream": "#FFFDD0",
-    "Sky Blue": "#87CEEB",
-    "Peach": "#FFDAB9"
-}
-
-# QR code templates presets
-qr_templates = {
-    "Standard": {
-        "fg": "Black",
-        "bg": "White",
-        "box_size": "5",
-        "border": "2",
-        "ecc": "M (15%)",
-        "pattern": "Standard"
-    },
-    "Professional": {
-        "fg": "Navy",
-        "bg": "Light Gray",
-        "box_size": "6",
-        "border": "2",
-        "ecc": "H (30%)",
-        "pattern": "Standard"
-    },
-    "Colorful": {
-        "fg": "Purple",
-        "bg": "Light Yellow",
-        "box_size": "7",
-        "border": "3",
-        "ecc": "Q (25%)",
-        "pattern": "Dots"
-    },
-    "High Contrast": {
-        "fg": "Black",
-        "bg": "Light Yellow",
-        "box_size": "8",
-        "border": "4",
-        "ecc": "H (30%)",
-        "pattern": "Standard"
-    },
-    "Modern": {
-        "fg": "Royal Blue",
-        "bg": "White",
-        "box_size": "6",
-        "border": "2",
-        "ecc": "M (15%)",
-        "pattern": "Rounded"
-    },
-    "Corporate": {
-        "fg": "Teal",
-        "bg": "White",
-        "box_size": "5",
-        "border": "2", 
-        "ecc": "M (15%)",
-        "pattern": "Standard"
-    }
-}
+# Start the background writer for analytics and history inserts
+start_writer('user_data.db')
 
 # Global variables
-generated_img = None
+generated_img = None  # Full-resolution image of the last generated QR code, for export
+generated_preview = None  # The same QR code at display size
+generated_style = None  # Style and logo of the last generated QR code, for vector exports
+generated_logo = None
 current_user_id = None
 is_admin = False
 logo_path = None
-is_dark_mode = False
+current_theme = "light"  # Key of the active theme in themes
 qr_data = None  # Store the last generated QR code data
-qr_format = "PNG"  # Default export format
+verify_future = None  # Background scan check of the last generated QR code
+history_page_size = 100  # History rows fetched per page while scrolling
+db_page_size = 200  # Database viewer rows fetched per page while scrolling
+preview_delay_ms = 250  # Pause in typing before the live preview re-renders
+preview_job = None  # Pending (debounced) live preview render
+preview_generation = 0  # Bumped on every new preview request; older renders are discarded
+preview_result = None  # Last live preview: {"key", "image", "full", "logo_error", "capacity"}
+preview_max_size = 300  # Largest QR code shown in the window, in pixels (exports stay full size)
+qr_photo = None  # The PhotoImage shown in qr_label, refilled in place while its size allows
+qr_photo_format = None  # (size, mode) of qr_photo
+preview_executor = ThreadPoolExecutor(max_workers=1)  # Renders live previews off the UI thread
 
 # Function to view database tables - Admin only
 def view_database():
@@ -182,102 +75,164 @@ def view_database():
     db_window = tk.Toplevel(root)
     db_window.title("Database Viewer (Admin Only)")
     db_window.geometry("800x500")
-    db_window.config(bg=bg_color)
+    theme_widget(db_window, bg="bg")
+    
+    # Make sure queued inserts are visible before reading
+    flush_writer()
     
     # Create notebook with tabs for each table
     db_tabs = ttk.Notebook(db_window)
     db_tabs.pack(fill="both", expand=True, padx=10, pady=10)
     
-    # Function to create a table view
-    def create_table_view(table_name, parent):
-        frame = tk.Frame(parent, bg=bg_color)
-        frame.pack(fill="both", expand=True)
+    # Per-tab state, keyed by the tab's widget name; each tab is built when first selected
+    table_views = {}
+    
+    # Function to build the table view of a tab
+    def create_table_view(view):
+        frame = view["frame"]
+        table_name = view["table"]
         
         # Create Treeview for data display
-        columns_frame = tk.Frame(frame, bg=bg_color)
+        columns_frame = ttk.Frame(frame)
         columns_frame.pack(fill="both", expand=True)
         
         # Get column names
-        cursor.execute(f"PRAGMA table_info({table_name})")
-        columns = [col[1] for col in cursor.fetchall()]
-        
-        # Create Treeview
-        tree = ttk.Treeview(columns_frame, columns=columns, show="headings")
-        tree.pack(fill="both", expand=True, side="left")
+        columns = table_columns(conn, table_name)
         
         # Add scrollbars
-        yscrollbar = ttk.Scrollbar(columns_frame, orient="vertical", command=tree.yview)
+        yscrollbar = ttk.Scrollbar(columns_frame, orient="vertical")
         yscrollbar.pack(side="right", fill="y")
         
+        # Treeview scroll callback: keep the scrollbar in sync and fetch more rows near the bottom
+        def on_tree_scroll(first, last):
+            yscrollbar.set(first, last)
+            if float(last) >= 0.9 and not view["done"] and not view["loading"]:
+                view["loading"] = True
+                db_window.after_idle(lambda: load_table_page(view))
+        
+        # Create Treeview
+        tree = ttk.Treeview(columns_frame, columns=columns, show="headings", yscrollcommand=on_tree_scroll)
+        tree.pack(fill="both", expand=True, side="left")
+        yscrollbar.config(command=tree.yview)
+        
         xscrollbar = ttk.Scrollbar(frame, orient="horizontal", command=tree.xview)
         xscrollbar.pack(side="bottom", fill="x")
         
-        tree.configure(yscrollcommand=yscrollbar.set, xscrollcommand=xscrollbar.set)
+        tree.configure(xscrollcommand=xscrollbar.set)
         
         # Set column headings
         for col in columns:
             tree.heading(col, text=col)
             tree.column(col, width=100, minwidth=50)
         
-        # Get data and populate
-        cursor.execute(f"SELECT * FROM {table_name}")
-        rows = cursor.fetchall()
-        
-        for i, row in enumerate(rows):
-            tree.insert("", "end", values=row)
-            
         # Add row count label
-        count_label = tk.Label(frame, text=f"Total rows: {len(rows)}", bg=bg_color, fg=fg_color)
+        count_label = ttk.Label(frame)
         count_label.pack(pady=5)
-            
-        return frame
+        
+        view.update({"tree": tree, "count_label": count_label, "last_rowid": 0, "shown": 0,
+                     "done": False, "loading": False, "changes": conn.total_changes})
+        view["count"] = table_row_count(conn, table_name)
+        load_table_page(view)
+    
+    # Function to append the next page of rows to a table view
+    def load_table_page(view):
+        view["loading"] = False
+        if view["done"] or not db_window.winfo_exists():
+            return
+        rows = fetch_table_page(conn, view["table"], view["last_rowid"], db_page_size)
+        for row in rows:
+            # Items are keyed by rowid so refresh can find them again
+            view["tree"].insert("", "end", iid=str(row[0]), values=row[1:])
+        if rows:
+            view["last_rowid"] = rows[-1][0]
+        view["shown"] += len(rows)
+        view["done"] = len(rows) < db_page_size
+        update_count_label(view)
+    
+    # Function to show how many rows are loaded
+    def update_count_label(view):
+        view["count_label"].config(text=f"Total rows: {view['count']} (showing {view['shown']})")
+    
+    # Function to bring a loaded table view up to date with the database
+    def refresh_table_view(view):
+        view["count"] = table_row_count(conn, view["table"])
+        
+        # Rows of these tables change in place (rollup triggers, watermark upserts), so loaded
+        # rows can be stale; start again from the first page
+        if view["table"] in in_place_tables:
+            view["tree"].delete(*view["tree"].get_children())
+            view.update({"last_rowid": 0, "shown": 0, "done": False, "changes": conn.total_changes})
+            load_table_page(view)
+            return
+        
+        # Other tables only get rows appended by other connections, and rows deleted through
+        # this one; if it changed anything since the last load, drop the rows that no longer exist
+        if view["changes"] != conn.total_changes:
+            existing = set(fetch_rowids(conn, view["table"], view["last_rowid"]))
+            for iid in view["tree"].get_children():
+                if int(iid) not in existing:
+                    view["tree"].delete(iid)
+                    view["shown"] -= 1
+            view["changes"] = conn.total_changes
+        
+        # New rows come after the last rowid loaded; if every page was already loaded fetch them
+        # now, otherwise scrolling will reach them
+        if view["done"]:
+            view["done"] = False
+            load_table_page(view)
+        update_count_label(view)
+    
+    # Function to build a tab's view the first time it is selected
+    def on_tab_changed(event=None):
+        view = table_views.get(db_tabs.select())
+        if view is not None and "tree" not in view:
+            create_table_view(view)
     
     # Function to refresh data
     def refresh_data():
-        # Clear the notebook
-        for tab in db_tabs.tabs():
-            db_tabs.forget(tab)
-        
-        # Recreate tabs with fresh data
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-        tables = cursor.fetchall()
+        flush_writer()
+        update_writer_status()
         
-        for table in tables:
-            table_name = table[0]
-            if table_name != "sqlite_sequence":  # Skip SQLite internal tables
-                tab = create_table_view(table_name, db_tabs)
-                db_tabs.add(tab, text=table_name)
-    
-    # Create a tab for each table
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-    tables = cursor.fetchall()
-    
-    for table in tables:
-        table_name = table[0]
-        if table_name != "sqlite_sequence":  # Skip SQLite internal tables
-            tab = create_table_view(table_name, db_tabs)
-            db_tabs.add(tab, text=table_name)
+        # Only tabs that have been opened hold any rows
+        for view in table_views.values():
+            if "tree" in view:
+                refresh_table_view(view)
+    
+    # Function to show background writer status (queue depth and flush latency)
+    def update_writer_status():
+        info = writer_info()
+        writer_label.config(text=f"Write queue: {info['queue_depth']} pending - "
+                                 f"last flush {info['last_flush_ms']:.1f} ms, "
+                                 f"avg {info['avg_flush_ms']:.1f} ms over {info['transactions']} transactions")
+    
+    # Create an empty tab for each table
+    for table_name in list_tables(conn):
+        tab = ttk.Frame(db_tabs)
+        db_tabs.add(tab, text=table_name)
+        table_views[str(tab)] = {"table": table_name, "frame": tab}
+    
+    db_tabs.bind("<<NotebookTabChanged>>", on_tab_changed)
+    on_tab_changed()
+    
+    # Background writer status
+    writer_label = ttk.Label(db_window, font=("Arial", 8))
+    writer_label.pack()
+    update_writer_status()
     
     # Add control buttons at the bottom
-    button_frame = tk.Frame(db_window, bg=bg_color)
+    button_frame = ttk.Frame(db_window)
     button_frame.pack(pady=10)
     
     # Refresh button
-    refresh_button = tk.Button(button_frame, text="Refresh Data", command=refresh_data,
-                              bg=button_bg_color, fg=button_fg_color,
-                              activebackground=button_active_bg, activeforeground=button_active_fg)
+    refresh_button = ttk.Button(button_frame, text="Refresh Data", command=refresh_data)
     refresh_button.pack(side="left", padx=5)
     
     # Export button
-    export_button = tk.Button(button_frame, text="Export to CSV", command=export_database,
-                             bg=button_bg_color, fg=button_fg_color,
-                             activebackground=button_active_bg, activeforeground=button_active_fg)
+    export_button = ttk.Button(button_frame, text="Export to CSV", command=export_database)
     export_button.pack(side="left", padx=5)
     
     # Close button
-    close_button = tk.Button(button_frame, text="Close", command=db_window.destroy,
-                            bg=button_bg_color, fg=button_fg_color,
-                            activebackground=button_active_bg, activeforeground=button_active_fg)
+    close_button = ttk.Button(button_frame, text="Close", command=db_window.destroy)
     close_button.pack(side="left", padx=5)
 
 # Function to export database to CSV - Admin only
@@ -286,42 +241,50 @@ def export_database():
         messagebox.showinfo("Admin Only", "Database export is restricted to administrators only.")
         return
     
-    folder_path = filedialog.askdirectory(title="Select Export Folder")
-    if not folder_path:
-        return
+    # Create a window for the export options
+    export_window = tk.Toplevel(root)
+    export_window.title("Export Database")
+    export_window.geometry("380x200")
+    theme_widget(export_window, bg="bg")
+    
+    incremental_var = tk.BooleanVar(value=False)
+    compress_var = tk.BooleanVar(value=False)
+    
+    ttk.Checkbutton(export_window, text="Only rows added since the last incremental export",
+                    variable=incremental_var).pack(anchor="w", padx=20, pady=(20, 5))
+    ttk.Checkbutton(export_window, text="Compress files (gzip)",
+                    variable=compress_var).pack(anchor="w", padx=20, pady=5)
+    
+    # Function to run the export with the chosen options
+    def run_export():
+        folder_path = filedialog.askdirectory(title="Select Export Folder")
+        if not folder_path:
+            return
         
-    # Get all tables
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-    tables = cursor.fetchall()
-    
-    exported_files = []
-    for table in tables:
-        table_name = table[0]
-        if table_name != "sqlite_sequence":  # Skip SQLite internal tables
-            export_path = os.path.join(folder_path, f"{table_name}.csv")
-            
-            # Get column names
-            cursor.execute(f"PRAGMA table_info({table_name})")
-            columns = [col[1] for col in cursor.fetchall()]
-            
-            # Get data
-            cursor.execute(f"SELECT * FROM {table_name}")
-            rows = cursor.fetchall()
-            
-            # Write to CSV
-            try:
-                with open(export_path, 'w', newline='') as f:
-                    writer = csv.writer(f)
-                    writer.writerow(columns)  # Write header
-                    writer.writerows(rows)    # Write data
-                exported_files.append(f"{table_name}.csv")
-            except Exception as e:
-                messagebox.showerror("Export Error", f"Error exporting {table_name}: {str(e)}")
-    
-    if exported_files:
-        messagebox.showinfo("Export Complete", 
-                         f"Database tables exported to {folder_path}:\n" + 
-                         "\n".join(exported_files))
+        # Make sure queued inserts are included in the export
+        flush_writer()
+        
+        try:
+            exported = export_tables(conn, folder_path, incremental=incremental_var.get(),
+                                     compress=compress_var.get())
+        except Exception as e:
+            messagebox.showerror("Export Error", f"Error exporting database: {str(e)}")
+            return
+        
+        export_window.destroy()
+        if exported:
+            messagebox.showinfo("Export Complete", 
+                             f"Database tables exported to {folder_path}:\n" + 
+                             "\n".join(f"{file_name} ({count} rows)" for _, file_name, count in exported))
+        else:
+            messagebox.showinfo("Export Complete", "No new rows to export since the last incremental export.")
+    
+    button_frame = ttk.Frame(export_window)
+    button_frame.pack(pady=20)
+    
+    ttk.Button(button_frame, text="Export", command=run_export).pack(side="left", padx=5)
+    
+    ttk.Button(button_frame, text="Cancel", command=export_window.destroy).pack(side="left", padx=5)
 
 # Function to apply a QR template
 def apply_template():
@@ -430,57 +393,42 @@ def show_analytics():
     analytics_window = tk.Toplevel(root)
     analytics_window.title("QR Code Analytics")
     analytics_window.geometry("500x400")
-    analytics_window.config(bg=bg_color)
-    
-    # Get analytics data from database
-    cursor.execute("""
-        SELECT qr_type, COUNT(*) as count
-        FROM analytics
-        WHERE user_id = ?
-        GROUP BY qr_type
-        ORDER BY count DESC
-    """, (current_user_id,))
+    theme_widget(analytics_window, bg="bg")
     
-    type_data = cursor.fetchall()
+    # Make sure queued inserts are visible before reading
+    flush_writer()
     
-    # Get date-based analytics
-    cursor.execute("""
-        SELECT strftime('%Y-%m-%d', created_at) as date, COUNT(*) as count
-        FROM analytics
-        WHERE user_id = ?
-        GROUP BY date
-        ORDER BY date DESC
-        LIMIT 7
-    """, (current_user_id,))
+    # Get analytics data from the daily rollup table
+    type_data = analytics_by_type(conn, current_user_id)
     
-    date_data = cursor.fetchall()
+    # Get date-based analytics (last 7 days with activity)
+    date_data = analytics_by_day(conn, current_user_id, limit=7)
     
     # Create tabs for different analytics views
     analytics_tabs = ttk.Notebook(analytics_window)
     analytics_tabs.pack(fill="both", expand=True, padx=10, pady=10)
     
     # Tab for QR code types
-    types_tab = tk.Frame(analytics_tabs, bg=bg_color)
+    types_tab = ttk.Frame(analytics_tabs)
     analytics_tabs.add(types_tab, text="QR Types")
     
     # Tab for date-based usage
-    dates_tab = tk.Frame(analytics_tabs, bg=bg_color)
+    dates_tab = ttk.Frame(analytics_tabs)
     analytics_tabs.add(dates_tab, text="Usage by Date")
     
     # Create visualization for QR types
-    tk.Label(types_tab, text="Your Most Generated QR Code Types", 
-            font=("Arial", 12, "bold"), bg=bg_color, fg=fg_color).pack(pady=10)
+    ttk.Label(types_tab, text="Your Most Generated QR Code Types", font=("Arial", 12, "bold")).pack(pady=10)
     
     # Simple bar chart visualization
     canvas_width = 400
     canvas_height = 250
-    canvas = tk.Canvas(types_tab, width=canvas_width, height=canvas_height, bg=entry_bg_color)
+    canvas = theme_widget(tk.Canvas(types_tab, width=canvas_width, height=canvas_height), bg="entry_bg")
     canvas.pack(pady=10)
     
     if not type_data:
         canvas.create_text(canvas_width/2, canvas_height/2, 
                          text="No analytics data available yet",
-                         fill=fg_color, font=("Arial", 12))
+                         fill=fg_color, tags=("theme_fg",), font=("Arial", 12))
     else:
         # Determine the maximum count for scaling
         max_count = max([count for _, count in type_data])
@@ -498,28 +446,27 @@ def show_analytics():
             y2 = canvas_height - 30
             
             # Draw bar
-            canvas.create_rectangle(x1, y1, x2, y2, fill=accent_color)
+            canvas.create_rectangle(x1, y1, x2, y2, fill=accent_color, tags=("theme_accent",))
             
             # Add label
             canvas.create_text(x1 + bar_width/2, canvas_height - 15, 
-                             text=qr_type.capitalize(), fill=fg_color)
+                             text=qr_type.capitalize(), fill=fg_color, tags=("theme_fg",))
             
             # Add count at top of bar
             canvas.create_text(x1 + bar_width/2, y1 - 10, 
-                             text=str(count), fill=fg_color)
+                             text=str(count), fill=fg_color, tags=("theme_fg",))
     
     # Create visualization for dates
-    tk.Label(dates_tab, text="Your QR Code Generation Activity", 
-            font=("Arial", 12, "bold"), bg=bg_color, fg=fg_color).pack(pady=10)
+    ttk.Label(dates_tab, text="Your QR Code Generation Activity", font=("Arial", 12, "bold")).pack(pady=10)
     
     # Simple line chart for dates
-    canvas = tk.Canvas(dates_tab, width=canvas_width, height=canvas_height, bg=entry_bg_color)
+    canvas = theme_widget(tk.Canvas(dates_tab, width=canvas_width, height=canvas_height), bg="entry_bg")
     canvas.pack(pady=10)
     
     if not date_data:
         canvas.create_text(canvas_width/2, canvas_height/2, 
                          text="No analytics data available yet",
-                         fill=fg_color, font=("Arial", 12))
+                         fill=fg_color, tags=("theme_fg",), font=("Arial", 12))
     else:
         # Reverse the data to show chronological order
         date_data = list(reversed(date_data))
@@ -539,127 +486,118 @@ def show_analytics():
             points.append((x, y))
             
             # Draw point
-            canvas.create_oval(x-4, y-4, x+4, y+4, fill=accent_color)
+            canvas.create_oval(x-4, y-4, x+4, y+4, fill=accent_color, tags=("theme_accent",))
             
             # Add date label
             canvas.create_text(x, canvas_height - 20, 
-                             text=date.split('-')[2], fill=fg_color, 
+                             text=date.split('-')[2], fill=fg_color, tags=("theme_fg",), 
                              angle=45, anchor="e")
             
             # Add count label
-            canvas.create_text(x, y - 15, text=str(count), fill=fg_color)
+            canvas.create_text(x, y - 15, text=str(count), fill=fg_color, tags=("theme_fg",))
         
         # Draw lines connecting points
         for i in range(len(points) - 1):
             x1, y1 = points[i]
             x2, y2 = points[i + 1]
-            canvas.create_line(x1, y1, x2, y2, fill=accent_color, width=2)
+            canvas.create_line(x1, y1, x2, y2, fill=accent_color, tags=("theme_accent",), width=2)
 
 # Function to record analytics
 def record_analytics(qr_type):
     if current_user_id:
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        cursor.execute("INSERT INTO analytics (user_id, qr_type, created_at) VALUES (?, ?, ?)",
-                     (current_user_id, qr_type, current_time))
-        conn.commit()
-
-# Function to check QR code data capacity
-def check_capacity(data):
-    # Calculate approximate capacity
-    data_length = len(data)
-    
-    # QR code version capacities (approximate char counts for alphanumeric data with M error correction)
-    capacities = {
-        1: 25,     # Version 1
-        2: 47,     # Version 2
-        5: 255,    # Version 5
-        10: 859,   # Version 10
-        20: 2800,  # Version 20
-        25: 4350,  # Version 25
-        40: 7089   # Version 40 (max)
-    }
-    
-    # Determine estimated version
-    estimated_version = 1
-    for version, capacity in sorted(capacities.items()):
-        if data_length <= capacity:
-            estimated_version = version
-            break
-    
-    # Calculate percentage of capacity used
-    version_capacity = next((cap for ver, cap in sorted(capacities.items()) if ver >= estimated_version), 7089)
-    capacity_percent = min(100, (data_length / version_capacity) * 100)
-    
-    return {
-        "length": data_length,
-        "version": estimated_version,
-        "capacity_percent": capacity_percent
-    }
-
-
+        queue_write("INSERT INTO analytics (user_id, qr_type, created_at) VALUES (?, ?, ?)",
+                    (current_user_id, qr_type, current_time))
+
+# Function to open the QR code scanner
+def scan_qr_code():
+    if not scanner_available:
+        messagebox.showerror("Scanner Unavailable",
+                             "QR scanning requires OpenCV and NumPy. Install with: pip install opencv-python numpy "
+                             "(pyzbar is used too when installed)")
+        return
     
     # Create a new window for QR scanner
     scanner_window = tk.Toplevel(root)
     scanner_window.title("QR Code Scanner")
     scanner_window.geometry("640x520")
-    scanner_window.config(bg=bg_color)
+    theme_widget(scanner_window, bg="bg")
     
     # Frame for video
-    video_frame = tk.Label(scanner_window)
+    video_frame = ttk.Label(scanner_window)
     video_frame.pack(pady=10)
     
     # Result display
-    result_frame = tk.Frame(scanner_window, bg=bg_color)
+    result_frame = ttk.Frame(scanner_window)
     result_frame.pack(fill="x", padx=20, pady=10)
     
-    tk.Label(result_frame, text="Decoded Data:", bg=bg_color, fg=fg_color,
-            font=("Arial", 11, "bold")).pack(anchor="w")
+    ttk.Label(result_frame, text="Decoded Data:", font=("Arial", 11, "bold")).pack(anchor="w")
     
-    result_text = tk.Text(result_frame, height=5, width=60, bg=entry_bg_color, fg=entry_fg_color)
+    result_text = theme_widget(tk.Text(result_frame, height=5, width=60),
+                           bg="entry_bg", fg="entry_fg", insertbackground="entry_fg")
     result_text.pack(fill="x", pady=5)
     
     # Buttons
-    button_frame = tk.Frame(scanner_window, bg=bg_color)
+    button_frame = ttk.Frame(scanner_window)
     button_frame.pack(pady=10)
     
-    # Function to handle video streaming
-    def video_stream():
-        nonlocal cap
-        if cap is not None:
-            ret, frame = cap.read()
-            if ret:
-                # Process frame for QR codes
-                decoded_objects = decode(frame)
-                
-                # Draw bounding box around QR codes
-                for obj in decoded_objects:
-                    # Get the QR code's position
-                    points = obj.polygon
-                    if len(points) > 4:
-                        hull = cv2.convexHull(np.array([point for point in points], dtype=np.float32))
-                        cv2.polylines(frame, [hull], True, (0, 255, 0), 2)
-                    else:
-                        # Draw the polygon around the QR code
-                        pts = np.array([points], np.int32)
-                        pts = pts.reshape((-1, 1, 2))
-                        cv2.polylines(frame, [pts], True, (0, 255, 0), 2)
-                    
-                    # Get the data
-                    qr_data = obj.data.decode('utf-8')
-                    
-                    # Display data
-                    result_text.delete(1.0, tk.END)
-                    result_text.insert(tk.END, qr_data)
-                
-                # Convert frame to display in tkinter
-                cv2image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGBA)
-                img = Image.fromarray(cv2image)
-                imgtk = ImageTk.PhotoImage(image=img)
-                video_frame.imgtk = imgtk
-                video_frame.config(image=imgtk)
-            
-            # Call this function again after 10ms
-            video_frame.after(10, video_stream)
+    # Status line: frame rates, skipped frames and decode latency
+    status_label = ttk.Label(scanner_window, font=("Arial", 8))
+    status_label.pack()
+    
+    # Start the capture and decode threads
+    try:
+        scanner = start_scanner(0)
+    except Exception as e:
+        messagebox.showerror("Camera Error", f"Could not access webcam: {str(e)}")
+        scanner_window.destroy()
+        return
+    
+    shown_version = [0]
+    preview = [None]  # the window's one PhotoImage, created for the first frame
+    
+    # Function to show the newest frame and results; decoding happens on the scanner threads
+    def show_latest():
+        if not scanner_window.winfo_exists():
+            return
+        
+        # Paste the newest frame into the preview image (nothing new means nothing to redraw)
+        image = scanner["display"].take(0)
+        if image is not None:
+            height, width = image.shape[:2]
+            if preview[0] is None or (preview[0].width(), preview[0].height()) != (width, height):
+                preview[0] = ImageTk.PhotoImage("RGB", (width, height))
+                video_frame.imgtk = preview[0]
+                video_frame.config(image=preview[0])
+            # frombuffer wraps the frame without copying it
+            preview[0].paste(Image.frombuffer("RGB", (width, height), image, "raw", "RGB", 0, 1))
+            release_display_frame(scanner, image)
+        
+        # Display data when new codes are found
+        version, codes = latest_codes(scanner)
+        if version != shown_version[0]:
+            shown_version[0] = version
+            if codes:
+                result_text.delete(1.0, tk.END)
+                result_text.insert(tk.END, "\n".join(data for data, _ in codes))
+        
+        info = scanner_info(scanner)
+        strategies = ", ".join(f"{name} {stats['hit_rate']:.0%} hits in {stats['avg_ms']:.1f} ms"
+                               for name, stats in info["strategies"].items() if stats["attempts"])
+        backends = ", ".join(f"{name} {stats['hit_rate']:.0%} hits in {stats['avg_ms']:.1f} ms"
+                             for name, stats in info["backends"].items() if stats["attempts"])
+        status_label.config(text=f"Camera {info['capture_fps']:.0f} fps, display {info['display_fps']:.0f} fps - "
+                                 f"decoding {info['decode_fps']:.0f} fps, "
+                                 f"{info['avg_decode_ms']:.1f} ms per frame, {info['skipped']} frames skipped\n"
+                                 f"Strategies: {strategies}\nDecoders: {backends}")
+        
+        # Call this function again after 15ms
+        video_frame.after(15, show_latest)
+    
+    # Function to stop the scanner and close the window
+    def close_scanner():
+        stop_scanner(scanner)
+        scanner_window.destroy()
     
     # Function to copy decoded data to clipboard
     def copy_to_clipboard():
@@ -670,131 +608,188 @@ def check_capacity(data):
             messagebox.showinfo("Copied", "Data copied to clipboard")
     
     # Button to copy data
-    copy_button = tk.Button(button_frame, text="Copy to Clipboard", command=copy_to_clipboard,
-                          bg=button_bg_color, fg=button_fg_color)
+    copy_button = ttk.Button(button_frame, text="Copy to Clipboard", command=copy_to_clipboard)
     copy_button.pack(side="left", padx=5)
     
     # Button to close scanner
-    close_button = tk.Button(button_frame, text="Close Scanner", 
-                           command=lambda: [cap.release(), scanner_window.destroy()],
-                           bg=button_bg_color, fg=button_fg_color)
+    close_button = ttk.Button(button_frame, text="Close Scanner", command=close_scanner)
     close_button.pack(side="left", padx=5)
     
-    # Initialize webcam
-    cap = None
-    try:
-        cap = cv2.VideoCapture(0)
-        video_stream()
-    except Exception as e:
-        messagebox.showerror("Camera Error", f"Could not access webcam: {str(e)}")
-        scanner_window.destroy()
-        return
-    
     # Handle window closing
-    scanner_window.protocol("WM_DELETE_WINDOW", lambda: [cap.release(), scanner_window.destroy()])
-
-# Function to generate QR Code
-def generate_qr(event_type='text'):
-    global generated_img, qr_data
-    
-    # Get customization options
-    foreground_color = foreground_colors[fg_color_var.get()]
-    background_color = background_colors[bg_color_var.get()]
-    box_size = int(box_size_var.get())
-    border_size = int(border_size_var.get())
-    error_correction = error_correction_var.get()
-    
-    # Convert error correction string to qrcode constant
-    if error_correction == "L (7%)":
-        error_level = qrcode.constants.ERROR_CORRECT_L
-    elif error_correction == "M (15%)":
-        error_level = qrcode.constants.ERROR_CORRECT_M
-    elif error_correction == "Q (25%)":
-        error_level = qrcode.constants.ERROR_CORRECT_Q
-    else:  # H (30%)
-        error_level = qrcode.constants.ERROR_CORRECT_H
+    scanner_window.protocol("WM_DELETE_WINDOW", close_scanner)
     
-    # Get content based on QR type
+    show_latest()
+
+
+# Function to read the current customization options as a style dict
+def current_style():
+    return {
+        "fg": fg_color_var.get(),
+        "bg": bg_color_var.get(),
+        "box_size": box_size_var.get(),
+        "border": border_size_var.get(),
+        "ecc": error_correction_var.get()
+    }
+
+
+# Function to read the form fields for a QR type
+def current_fields(event_type):
     if event_type == 'text':
-        input_text = text_entry.get()
+        return {"text": text_entry.get()}
     elif event_type == 'url':
-        input_text = url_entry.get()
-        # Prepend http:// if no protocol is specified
-        if input_text and not input_text.startswith(('http://', 'https://')):
-            input_text = 'https://' + input_text
+        return {"url": url_entry.get()}
     elif event_type == 'event':
-        event_date = event_date_entry.get()
-        event_time = event_time_entry.get()
-        event_details = event_details_entry.get()
-        event_location = event_location_entry.get()
-        input_text = f"BEGIN:VEVENT\nSUMMARY:{event_details}\nLOCATION:{event_location}\nDTSTART:{event_date.replace('-', '')}T{event_time.replace(':', '')}00\nEND:VEVENT"
+        return {
+            "date": event_date_entry.get(),
+            "time": event_time_entry.get(),
+            "details": event_details_entry.get(),
+            "location": event_location_entry.get()
+        }
     elif event_type == 'contact':
-        name = contact_name_entry.get()
-        phone = contact_phone_entry.get()
-        email = contact_email_entry.get()
-        input_text = f"BEGIN:VCARD\nVERSION:3.0\nN:{name}\nTEL:{phone}\nEMAIL:{email}\nEND:VCARD"
+        return {
+            "name": contact_name_entry.get(),
+            "phone": contact_phone_entry.get(),
+            "email": contact_email_entry.get()
+        }
     elif event_type == 'wifi':
-        ssid = wifi_ssid_entry.get()
-        password = wifi_password_entry.get()
-        security = wifi_security_var.get()
-        input_text = f"WIFI:S:{ssid};T:{security};P:{password};;"
+        return {
+            "ssid": wifi_ssid_entry.get(),
+            "password": wifi_password_entry.get(),
+            "security": wifi_security_var.get()
+        }
+    return {}
+
+
+# Function to show how much of the QR code capacity a payload uses (from check_capacity or estimate_capacity)
+def show_capacity(capacity_info):
+    if capacity_info["fits"]:
+        capacity_text = (f"Data: {capacity_info['length']} chars ({capacity_info['bytes']} bytes, {capacity_info['mode']})"
+                         f" - QR Version {capacity_info['version']} - Usage: {capacity_info['capacity_percent']:.1f}%")
+    else:
+        capacity_text = f"Data: {capacity_info['length']} chars - too long for a QR code at this ECC level"
+    capacity_info_label.config(text=capacity_text)
+    capacity_gauge.config(value=capacity_info["max_percent"])
+
+
+# Function to get the QR type of the selected tab
+def current_qr_type():
+    return qr_tab_types[qr_tabs.index("current")]
+
+
+# Function to update the capacity gauge as the user types. Only the capacity tables are read
+# here; the live preview worker follows up with the exact figures of the segmented payload.
+def update_capacity_info(event=None):
+    qr_type = current_qr_type()
+    input_text = build_payload(qr_type, current_fields(qr_type))
+    show_capacity(estimate_capacity(input_text, resolve_error_correction(error_correction_var.get())))
+
+
+# Function to describe everything a rendered QR code depends on. The logo's modification
+# time is part of it (as in prepare_logo), so an edited logo file is rendered again.
+def render_key(qr_type, payload):
+    logo = logo_path if add_logo_var.get() and logo_path else None
+    logo_mtime = None
+    if logo:
+        try:
+            logo_mtime = os.stat(logo).st_mtime_ns
+        except OSError:
+            pass  # Missing file: rendering reports it as a logo error
+    return (qr_type, payload, tuple(sorted(current_style().items())), logo, logo_mtime)
+
+
+# Function to render a QR code with its logo. Returns (image, logo error or None).
+def render_image(payload, style, logo, max_size=None):
+    img = render_qr(payload, style, max_size=max_size)
+    logo_error = None
+    if logo:
+        try:
+            img = add_logo(img, logo)
+        except Exception as e:
+            logo_error = str(e)
+    return img, logo_error
+
+
+# Function to render the display-size preview and, unless preview_only, the full-size image.
+# Returns (preview, full image, logo error); both are the same image when it fits the display,
+# and the full image is None when it was not needed.
+def render_images(payload, style, logo, preview_only=False):
+    preview, logo_error = render_image(payload, style, logo, preview_max_size)
+    if preview.size[0] == rendered_size(payload, style):
+        return preview, preview, logo_error
+    if preview_only:
+        return preview, None, logo_error
+    img, logo_error = render_image(payload, style, logo)
+    return preview, img, logo_error
+
+
+# Function to show a QR code image in the display area
+def show_qr_image(img):
+    global qr_photo, qr_photo_format
+    # Copy the pixels straight into the shown PhotoImage when its size and mode still match
+    if qr_photo is not None and qr_photo_format == (img.size, img.mode):
+        qr_photo.paste(img)
+        return
+    qr_photo = ImageTk.PhotoImage(img)
+    qr_photo_format = (img.size, img.mode)
+    qr_label.config(image=qr_photo)
+
+
+# Function to generate QR Code
+def generate_qr(event_type='text'):
+    global generated_img, generated_preview, generated_style, generated_logo, qr_data
+    global preview_result, preview_generation
+    
+    # Get content based on QR type
+    input_text = build_payload(event_type, current_fields(event_type))
 
     if not input_text:
         messagebox.showwarning("Input Error", "Please enter all required information to generate a QR code.")
         return
     
+    # Reuse the live preview if it was rendered from exactly these inputs
+    key = render_key(event_type, input_text)
+    if preview_result is not None and preview_result["key"] == key:
+        preview, img, logo_error = preview_result["image"], preview_result["full"], preview_result["logo_error"]
+        if img is None:
+            # The preview was scaled down to fit; export needs full resolution
+            img, logo_error = render_image(input_text, current_style(), key[3])
+    else:
+        # Render the QR code with the current customization options
+        try:
+            preview, img, logo_error = render_images(input_text, current_style(), key[3])
+        except DataOverflowError:
+            messagebox.showerror("Input Error", "Too much data for a QR code. Shorten the content or choose a lower ECC level.")
+            return
+    # Exact capacity figures; the render above has already planned the segments
+    capacity_info = check_capacity(input_text, resolve_error_correction(error_correction_var.get()))
+    
+    # Any preview still rendering is now out of date
+    preview_generation += 1
+    preview_result = {"key": key, "image": preview, "full": img, "logo_error": logo_error,
+                      "capacity": capacity_info}
+    
     # Save the QR data for potential sharing
     qr_data = input_text
     
     # Record analytics
     record_analytics(event_type)
     
-    # Create QR code with specified parameters
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=error_level,
-        box_size=box_size,
-        border=border_size
-    )
-    qr.add_data(input_text)
-    qr.make(fit=True)
+    # Show data capacity
+    show_capacity(capacity_info)
     
-    img = qr.make_image(fill_color=foreground_color, back_color=background_color)
+    if logo_error:
+        messagebox.showerror("Logo Error", f"Error adding logo: {logo_error}")
     
-    # Check data capacity
-    capacity_info = check_capacity(input_text)
-    capacity_text = f"Data: {capacity_info['length']} chars - QR Version ~{capacity_info['version']} - Usage: {capacity_info['capacity_percent']:.1f}%"
-    capacity_info_label.config(text=capacity_text)
-    
-    # Add logo if option is selected
-    if add_logo_var.get() and logo_path:
-        try:
-            logo = Image.open(logo_path)
-            # Calculate logo size (max 30% of QR code)
-            logo_size = int(img.size[0] * 0.3)
-            logo = logo.resize((logo_size, logo_size))
-            
-            # Calculate position (center)
-            pos = ((img.size[0] - logo.size[0]) // 2, (img.size[1] - logo.size[1]) // 2)
-            
-            
-            # Paste the logo onto the QR code
-            img.paste(logo, pos, logo)
-        except Exception as e:
-            messagebox.showerror("Logo Error", f"Error adding logo: {str(e)}")
-    
-    
-    # Convert image to display in Tkinter
-    img_byte_array = io.BytesIO()
-    img.save(img_byte_array, format="PNG")
-    img_byte_array = img_byte_array.getvalue()
-
-    img_tk = ImageTk.PhotoImage(Image.open(io.BytesIO(img_byte_array)))
-
-    qr_label.config(image=img_tk)
-    qr_label.image = img_tk
+    show_qr_image(preview)
+    qr_display_frame.config(text="Generated QR Code")
 
     generated_img = img  # Save for later download
+    generated_preview = preview
+    generated_style = current_style()
+    generated_logo = None if logo_error else key[3]  # The saved image has no logo when adding it failed
+    
+    # Check in the background that the code still scans (the preview is already shown)
+    start_verify(img, input_text)
     
     # Show share button as we have a valid QR code
     share_button.config(state="normal")
@@ -804,22 +799,154 @@ def generate_qr(event_type='text'):
         save_to_history(event_type, input_text)
 
 
+# Function to re-render the live preview once typing pauses (later calls restart the wait)
+def schedule_preview(event=None):
+    global preview_job
+    if preview_job is not None:
+        root.after_cancel(preview_job)
+    preview_job = root.after(preview_delay_ms, start_preview)
+
+
+# Function to render a live preview (runs on the preview worker thread)
+def render_preview(generation, payload, style, logo):
+    # Newer input has arrived while this request was queued
+    if generation != preview_generation:
+        return None
+    # Plan the segments here so the Tk thread never has to; rendering reuses the plan
+    capacity_info = check_capacity(payload, resolve_error_correction(style["ecc"]))
+    if not capacity_info["fits"]:
+        return capacity_info, None
+    return capacity_info, render_images(payload, style, logo, preview_only=True)
+
+
+# Function to start rendering the live preview for the current inputs
+def start_preview():
+    global preview_job, preview_generation
+    preview_job = None
+    preview_generation += 1
+    if not live_preview_var.get():
+        # A preview left on screen would no longer match the fields
+        clear_preview()
+        return
+    
+    qr_type = current_qr_type()
+    input_text = build_payload(qr_type, current_fields(qr_type))
+    if not input_text:
+        clear_preview()
+        return
+    key = render_key(qr_type, input_text)
+    if preview_result is not None and preview_result["key"] == key:
+        # Still showing; put back the exact figures over the keystroke estimate
+        show_capacity(preview_result["capacity"])
+        return
+    
+    future = preview_executor.submit(render_preview, preview_generation, input_text, current_style(), key[3])
+    show_preview(future, preview_generation, key)
+
+
+# Function to show a live preview once it is rendered, unless newer input has arrived
+def show_preview(future, generation, key):
+    global preview_result
+    if generation != preview_generation:
+        return
+    if not future.done():
+        root.after(30, lambda: show_preview(future, generation, key))
+        return
+    
+    try:
+        result = future.result()
+    except DataOverflowError:
+        # Too much data for a QR code - the capacity gauge already tells the user
+        clear_preview()
+        return
+    except Exception as e:
+        # Anything else would also fail on Generate; say so without interrupting typing
+        clear_preview()
+        qr_display_frame.config(text=f"Live Preview failed: {str(e)}")
+        return
+    if result is None:
+        return
+    
+    capacity_info, images = result
+    show_capacity(capacity_info)
+    if images is None:
+        # Too much data for a QR code - the capacity label says so
+        clear_preview()
+        return
+    preview_result = {"key": key, "image": images[0], "full": images[1], "logo_error": images[2],
+                      "capacity": capacity_info}
+    show_qr_image(images[0])
+    qr_display_frame.config(text="Live Preview (click Generate to save)")
+
+
+# Function to drop the live preview and go back to showing the last generated QR code
+def clear_preview():
+    global preview_result, qr_photo
+    preview_result = None
+    if generated_preview is not None:
+        show_qr_image(generated_preview)
+    else:
+        qr_label.config(image="")
+        qr_photo = None
+    qr_display_frame.config(text="Generated QR Code")
+
+
+# Function to handle any change to the QR content or style
+def on_input_changed(event=None):
+    update_capacity_info()
+    schedule_preview()
+
+
+# Function to start a background check that a generated QR code decodes back to its data
+def start_verify(img, payload):
+    global verify_future
+    if not (scanner_available and verify_var.get()):
+        verify_future = None
+        verify_label.config(text="")
+        return
+    
+    verify_future = verify_in_background(img, payload)
+    verify_label.config(text="Scan check: checking...", foreground="")
+    show_verify_result(verify_future)
+
+
+# Function to show the scan check result once it is ready
+def show_verify_result(future):
+    # A newer QR code has been generated since; its own check will report
+    if future is not verify_future:
+        return
+    if not future.done():
+        root.after(50, lambda: show_verify_result(future))
+        return
+    
+    try:
+        ok, reason = future.result()
+    except Exception as e:
+        ok, reason = False, f"check failed: {str(e)}"
+    
+    if ok:
+        verify_label.config(text="Scan check: OK", foreground="green")
+    else:
+        verify_label.config(text=f"Scan check FAILED - {reason}", foreground="red")
+
+
 # Function to save QR generation to history
 def save_to_history(qr_type, content):
     current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    cursor.execute("INSERT INTO qr_history (user_id, qr_type, content, created_at) VALUES (?, ?, ?, ?)",
-                  (current_user_id, qr_type, content, current_time))
-    conn.commit()
+    queue_write("INSERT INTO qr_history (user_id, qr_type, content, created_at) VALUES (?, ?, ?, ?)",
+                (current_user_id, qr_type, content, current_time))
 
 
-# Function to load history
-def load_history():
+# Function to load one page of history (newest first); after is the (created_at, id) of the last row shown
+def load_history(after=None, limit=None):
     if not current_user_id:
         return []
     
-    cursor.execute("SELECT id, qr_type, content, created_at FROM qr_history WHERE user_id = ? ORDER BY created_at DESC",
-                  (current_user_id,))
-    return cursor.fetchall()
+    # Make sure queued inserts are visible before reading the first page
+    if after is None:
+        flush_writer()
+    
+    return fetch_history_page(conn, current_user_id, after, limit or history_page_size)
 
 
 # Function to share QR code
@@ -832,14 +959,13 @@ def share_qr_code():
     share_window = tk.Toplevel(root)
     share_window.title("Share QR Code")
     share_window.geometry("400x300")
-    share_window.config(bg=bg_color)
+    theme_widget(share_window, bg="bg")
     
     # Frame for sharing options
-    options_frame = tk.Frame(share_window, bg=bg_color)
+    options_frame = ttk.Frame(share_window)
     options_frame.pack(pady=10, fill="x", padx=20)
     
-    tk.Label(options_frame, text="Share Options", font=("Arial", 14, "bold"),
-            bg=bg_color, fg=fg_color).pack(pady=5)
+    ttk.Label(options_frame, text="Share Options", font=("Arial", 14, "bold")).pack(pady=5)
     
     # Function to copy data to clipboard
     def copy_data():
@@ -904,49 +1030,70 @@ def share_qr_code():
     
     # Create buttons for each option
     for label, command in options:
-        button = tk.Button(options_frame, text=label, command=command,
-                         bg=button_bg_color, fg=button_fg_color,
-                         width=20, height=2)
+        button = ttk.Button(options_frame, text=label, command=command, width=20, style="Large.TButton")
         button.pack(pady=5)
     
     # Close button
-    tk.Button(options_frame, text="Close", command=share_window.destroy,
-             bg=button_bg_color, fg=button_fg_color,
-             width=20, height=1).pack(pady=10)
+    ttk.Button(options_frame, text="Close", command=share_window.destroy, width=20).pack(pady=10)
 
 
 # Function to display history
 def show_history():
-    history_items = load_history()
+    first_page = load_history()
     
     # Create a new window for history
     history_window = tk.Toplevel(root)
     history_window.title("QR Code History")
     history_window.geometry("600x400")
-    history_window.config(bg=bg_color)
+    theme_widget(history_window, bg="bg")
     
-    if not history_items:
-        tk.Label(history_window, text="No history found", bg=bg_color, fg=fg_color).pack(pady=20)
+    if not first_page:
+        ttk.Label(history_window, text="No history found").pack(pady=20)
         return
     
     # Create a frame with scrollbar
-    frame = tk.Frame(history_window, bg=bg_color)
+    frame = ttk.Frame(history_window)
     frame.pack(fill="both", expand=True, padx=10, pady=10)
     
-    scrollbar = tk.Scrollbar(frame)
+    scrollbar = ttk.Scrollbar(frame)
     scrollbar.pack(side="right", fill="y")
     
+    # Only the ids of the rows shown are kept; pages are fetched as the list is scrolled
+    history_ids = []
+    page_state = {"after": None, "done": False, "loading": False}
+    
+    # Function to append a page of rows to the listbox
+    def add_page(rows):
+        for item_id, qr_type, content, created_at in rows:
+            history_ids.append(item_id)
+            history_list.insert(tk.END, f"{created_at} - {qr_type.upper()}: {content}...")
+        if rows:
+            page_state["after"] = (rows[-1][3], rows[-1][0])
+        if len(rows) < history_page_size:
+            page_state["done"] = True
+    
+    # Function to fetch the next page once the list is scrolled near its end
+    def load_next_page():
+        page_state["loading"] = False
+        if page_state["done"] or not history_window.winfo_exists():
+            return
+        add_page(load_history(page_state["after"]))
+    
+    # Listbox scroll callback: keep the scrollbar in sync and fetch more rows near the bottom
+    def on_list_scroll(first, last):
+        scrollbar.set(first, last)
+        if float(last) >= 0.9 and not page_state["done"] and not page_state["loading"]:
+            page_state["loading"] = True
+            history_window.after_idle(load_next_page)
+    
     # Create a listbox with scrollbar
-    history_list = tk.Listbox(frame, width=80, height=15, yscrollcommand=scrollbar.set, 
-                              bg=entry_bg_color, fg=fg_color, selectbackground=accent_color)
+    history_list = theme_widget(tk.Listbox(frame, width=80, height=15, yscrollcommand=on_list_scroll),
+                                bg="entry_bg", fg="fg", selectbackground="accent")
     history_list.pack(side="left", fill="both", expand=True)
     scrollbar.config(command=history_list.yview)
     
-    # Populate the listbox
-    for item in history_items:
-        item_id, qr_type, content, created_at = item
-        display_text = f"{created_at} - {qr_type.upper()}: {content[:40]}..."
-        history_list.insert(tk.END, display_text)
+    # Populate the listbox with the first page
+    add_page(first_page)
         
     # Function to regenerate selected QR code
     def regenerate_selected():
@@ -956,7 +1103,7 @@ def show_history():
             return
             
         selected_index = selected_indices[0]
-        item_id = history_items[selected_index][0]
+        item_id = history_ids[selected_index]
         
         # Get full details
         cursor.execute("SELECT qr_type, content FROM qr_history WHERE id = ?", (item_id,))
@@ -1043,7 +1190,7 @@ def show_history():
             return
             
         selected_index = selected_indices[0]
-        item_id = history_items[selected_index][0]
+        item_id = history_ids[selected_index]
         
         # Confirm deletion
         if messagebox.askyesno("Confirm Deletion", "Are you sure you want to delete this history item?"):
@@ -1054,26 +1201,20 @@ def show_history():
             # Remove from listbox
             history_list.delete(selected_index)
             
-            # Update history_items list
-            history_items.pop(selected_index)
+            # Update the list of loaded ids
+            history_ids.pop(selected_index)
             
             messagebox.showinfo("Deleted", "History item deleted successfully")
     
     # Add buttons
-    button_frame = tk.Frame(history_window, bg=bg_color)
+    button_frame = ttk.Frame(history_window)
     button_frame.pack(pady=10)
     
-    tk.Button(button_frame, text="Regenerate Selected", command=regenerate_selected,
-             bg=button_bg_color, fg=button_fg_color, activebackground=button_active_bg,
-             activeforeground=button_active_fg).pack(side="left", padx=5)
+    ttk.Button(button_frame, text="Regenerate Selected", command=regenerate_selected).pack(side="left", padx=5)
     
-    tk.Button(button_frame, text="Delete Selected", command=delete_selected,
-             bg=button_bg_color, fg=button_fg_color, activebackground=button_active_bg,
-             activeforeground=button_active_fg).pack(side="left", padx=5)
+    ttk.Button(button_frame, text="Delete Selected", command=delete_selected).pack(side="left", padx=5)
     
-    tk.Button(button_frame, text="Close", command=history_window.destroy,
-             bg=button_bg_color, fg=button_fg_color, activebackground=button_active_bg,
-             activeforeground=button_active_fg).pack(side="left", padx=5)
+    ttk.Button(button_frame, text="Close", command=history_window.destroy).pack(side="left", padx=5)
 
 
 # Function to select a logo
@@ -1085,6 +1226,7 @@ def select_logo():
     if file_path:
         logo_path = file_path
         logo_label.config(text=f"Logo: {os.path.basename(file_path)}")
+        schedule_preview()
 
 
 # Function to handle login
@@ -1152,14 +1294,13 @@ def back_to_login():
 
 # Function to save QR Code
 def save_qr_code():
-    global generated_img
-
     if generated_img is None:
         messagebox.showwarning("QR Code Error", "No QR code generated to save.")
         return
     
     # Get the selected format
-    format_extension = qr_format.lower()
+    format_name = format_var.get()
+    format_extension = format_name.lower()
     
     file_path = filedialog.asksaveasfilename(
         defaultextension=f".{format_extension}",
@@ -1167,12 +1308,19 @@ def save_qr_code():
             ("PNG Files", "*.png"), 
             ("JPEG Files", "*.jpg"), 
             ("PDF Files", "*.pdf"),
+            ("SVG Files", "*.svg"),
+            ("EPS Files", "*.eps"),
             ("All Files", "*.*")
         ]
     )
 
     if file_path:
-        if format_extension == "pdf":
+        if format_name in vector_formats:
+            # Drawn from the module matrix, so it stays sharp at any size
+            save_vector(qr_data, file_path, format_name, generated_style)
+            note = "\n\nThe logo is only included in PNG, JPEG and PDF files." if generated_logo else ""
+            messagebox.showinfo("Success", f"QR code saved successfully as {file_path}{note}")
+        elif format_extension == "pdf":
             # Create a PDF with the QR code
             try:
                 # Import only when needed to avoid dependency issues
@@ -1180,11 +1328,6 @@ def save_qr_code():
                 from reportlab.lib.pagesizes import letter
                 from reportlab.lib.utils import ImageReader
                 
-                # Create temporary file for the image
-                img_byte_array = io.BytesIO()
-                generated_img.save(img_byte_array, format="PNG")
-                img_byte_array.seek(0)
-                
                 # Create the PDF
                 c = canvas.Canvas(file_path, pagesize=letter)
                 width, height = letter
@@ -1193,227 +1336,252 @@ def save_qr_code():
                 c.setFont("Helvetica-Bold", 16)
                 c.drawString(72, height - 72, "Your QR Code")
                 
-                # Add the QR code image
-                qr_img = ImageReader(img_byte_array)
-                img_width, img_height = generated_img.size
-                
-                # Scale to fit on page (max 80% of page width)
+                # Lay the code out in modules; scale to fit on page (max 80% of page width)
+                settings, modules, rectangles = vector_layout(qr_data, generated_style)
+                img_width = modules * settings["box_size"]
                 scale_factor = min(1.0, (width * 0.8) / img_width)
+                module_size = settings["box_size"] * scale_factor
                 scaled_width = img_width * scale_factor
-                scaled_height = img_height * scale_factor
                 
                 # Center on page
                 x = (width - scaled_width) / 2
-                y = height - 200 - scaled_height  # Leave space for title
+                y = height - 200 - scaled_width  # Leave space for title
+                
+                # Draw the QR code as vector rectangles (PDF counts y up from the bottom)
+                if not is_transparent(settings["bg"]):
+                    c.setFillColorRGB(*color_fractions(settings["bg"]))
+                    c.rect(x, y, scaled_width, scaled_width, stroke=0, fill=1)
+                c.setFillColorRGB(*color_fractions(settings["fg"]))
+                path = c.beginPath()
+                for rect_x, rect_y, rect_width, rect_height in rectangles:
+                    path.rect(x + rect_x * module_size, y + (modules - rect_y - rect_height) * module_size,
+                              rect_width * module_size, rect_height * module_size)
+                c.drawPath(path, stroke=0, fill=1)
                 
-                c.drawImage(qr_img, x, y, width=scaled_width, height=scaled_height)
+                # Add the logo on top, placed as add_logo places it on the image.
+                # If the logo file can no longer be read the PDF is still saved, without it.
+                logo_note = ""
+                if generated_logo:
+                    try:
+                        logo, _ = prepare_logo(generated_logo, int(img_width * 0.3))
+                        logo_offset = (img_width - logo.size[0]) // 2 * scale_factor
+                        logo_size = logo.size[0] * scale_factor
+                        c.drawImage(ImageReader(logo), x + logo_offset, y + scaled_width - logo_offset - logo_size,
+                                    width=logo_size, height=logo_size, mask="auto")
+                    except Exception as e:
+                        logo_note = f"\n\nThe logo could not be added: {e}"
                 
                 # Add footer with data
+                c.setFillColorRGB(0, 0, 0)
                 c.setFont("Helvetica", 10)
                 c.drawString(72, 72, f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
                 
                 c.save()
-                messagebox.showinfo("Success", f"QR code saved as PDF: {file_path}")
+                messagebox.showinfo("Success", f"QR code saved as PDF: {file_path}{logo_note}")
             except ImportError:
                 messagebox.showerror("Missing Dependency", 
                                   "PDF export requires ReportLab. Install with: pip install reportlab")
         else:
             # Regular image save
-            generated_img.save(file_path, format=format_extension.upper())
+            generated_img.save(file_path, format=format_name)
             messagebox.showinfo("Success", f"QR code saved successfully as {file_path}")
 
 
-# Function to toggle dark mode
-def toggle_dark_mode():
-    global is_dark_mode, bg_color, fg_color, button_bg_color, button_fg_color
-    global entry_bg_color, entry_fg_color, button_active_bg, button_active_fg
-    global accent_color, header_bg_color
-    
-    is_dark_mode = not is_dark_mode
-    
-    if is_dark_mode:
-        bg_color = "#2E2E2E"
-        fg_color = "#FFFFFF"
-        button_bg_color = "#454545"
-        button_fg_color = "#FFFFFF"
-        entry_bg_color = "#3D3D3D"
-        entry_fg_color = "#FFFFFF"
-        button_active_bg = "#575757"
-        button_active_fg = "#FFFFFF"
-        accent_color = "#4a6984"
-        header_bg_color = "#1E1E1E"
-    else:
-        bg_color = "#F0F0F0"
-        fg_color = "#333333"
-        button_bg_color = "#E0E0E0"
-        button_fg_color = "#333333"
-        entry_bg_color = "#FFFFFF"
-        entry_fg_color = "#333333"
-        button_active_bg = "#CCCCCC"
-        button_active_fg = "#333333"
-        accent_color = "#4a84b4"
-        header_bg_color = "#DDDDDD"
-    
-    # Update the root window
-    root.config(bg=bg_color)
-    
-    # Update header
-    header_label.config(bg=header_bg_color, fg=fg_color)
-    header_frame.config(bg=header_bg_color)
-    
-    # Update all frames
-    for frame in [login_frame, signup_frame, qr_code_generator_frame]:
-        frame.config(bg=bg_color)
-    
-    # Update all container frames within qr_code_generator_frame
-    for widget in qr_code_generator_frame.winfo_children():
-        if isinstance(widget, tk.Frame):
-            widget.config(bg=bg_color)
-            # Update children of this frame
-            for child in widget.winfo_children():
-                update_widget_colors(child)
-    
-    # Update tab frames
-    for tab in [url_tab, text_tab, event_tab, contact_tab, wifi_tab]:
-        tab.config(bg=bg_color)
-        for child in tab.winfo_children():
-            update_widget_colors(child)
-    
-    # Update customization frame and its children
-    customization_frame.config(bg=bg_color, fg=fg_color)
-    for child in customization_frame.winfo_children():
-        update_widget_colors(child)
-    
-    # Update logo frame and options frame
-    logo_frame.config(bg=bg_color)
-    for child in logo_frame.winfo_children():
-        update_widget_colors(child)
-    
-    # Update row frames and their children
-    for row_frame in [row1_frame, row2_frame, row3_frame]:
-        row_frame.config(bg=bg_color)
-        for child in row_frame.winfo_children():
-            update_widget_colors(child)
-    
-    # Update main canvas and scrollbar
-    main_canvas.config(bg=bg_color)
-    y_scrollbar.config(bg=button_bg_color)
-    
-    # Update the display frame
-    qr_display_frame.config(bg=bg_color, fg=fg_color)
-    qr_label.config(bg=bg_color)
-    
-    # Update capacity information label
-    capacity_info_label.config(bg=bg_color, fg=fg_color)
-    
-    # Update content frame and its children
-    content_frame.config(bg=bg_color)
-    tabs_frame.config(bg=bg_color)
-    display_frame.config(bg=bg_color)
-    
-    # Update utility bar
-    util_frame.config(bg=header_bg_color)
-    for child in util_frame.winfo_children():
-        if isinstance(child, tk.Button):
-            child.config(bg=button_bg_color, fg=button_fg_color,
-                        activebackground=button_active_bg, activeforeground=button_active_fg)
-            
-    # Update login frame
-    for child in login_frame.winfo_children():
-        update_widget_colors(child)
-        
-    # Update signup frame
-    for child in signup_frame.winfo_children():
-        update_widget_colors(child)
+# Color themes: one color per role. apply_theme pushes a theme into the named ttk styles
+# every ttk widget uses, so switching costs the same however many widgets and windows are open.
+themes = {
+    "light": {
+        "bg": "#F0F0F0",  # Light gray for light mode
+        "fg": "#333333",  # Dark gray text for light mode
+        "button_bg": "#E0E0E0",
+        "button_fg": "#333333",
+        "entry_bg": "#FFFFFF",
+        "entry_fg": "#333333",
+        "button_active_bg": "#CCCCCC",
+        "button_active_fg": "#333333",
+        "accent": "#4a84b4",
+        "header_bg": "#DDDDDD",
+        "pattern": "#D0D0D0"
+    },
+    "dark": {
+        "bg": "#2E2E2E",
+        "fg": "#FFFFFF",
+        "button_bg": "#454545",
+        "button_fg": "#FFFFFF",
+        "entry_bg": "#3D3D3D",
+        "entry_fg": "#FFFFFF",
+        "button_active_bg": "#575757",
+        "button_active_fg": "#FFFFFF",
+        "accent": "#4a6984",
+        "header_bg": "#1E1E1E",
+        "pattern": "#3A3A3A"
+    }
+}
+
+# Classic Tk widgets that have no ttk style (windows, canvases, text and list boxes), with the
+# theme role of each color option: {widget: {option: role}}
+classic_widgets = {}
+
+
+# Canvas items drawn in a theme color carry the tag "theme_" + role, e.g. tags=("theme_fg",),
+# so apply_theme can recolor charts in windows that are already open
+canvas_item_roles = ("fg", "accent")
+
+
+# Function to make a theme current (canvas drawings read fg_color and accent_color)
+def load_theme_colors(name):
+    global current_theme, fg_color, accent_color
+    current_theme = name
+    fg_color = themes[name]["fg"]
+    accent_color = themes[name]["accent"]
+
+
+# Function to register a classic Tk widget for theming, e.g. theme_widget(canvas, bg="entry_bg").
+# The widget is forgotten again when it is destroyed.
+def theme_widget(widget, **roles):
+    classic_widgets[widget] = roles
+    
+    # Toplevels also get <Destroy> for each of their children, so check which widget went
+    def forget(event):
+        if event.widget is widget:
+            classic_widgets.pop(widget, None)
+    widget.bind("<Destroy>", forget, add="+")
+    
+    theme = themes[current_theme]
+    widget.config(**{option: theme[role] for option, role in roles.items()})
+    return widget
+
+
+# Function to configure the named ttk styles for a theme
+def configure_styles(theme):
+    style.configure(".", background=theme["bg"], foreground=theme["fg"], fieldbackground=theme["entry_bg"],
+                    insertcolor=theme["entry_fg"], troughcolor=theme["bg"], selectbackground=theme["accent"])
+    style.configure("TEntry", foreground=theme["entry_fg"])
+    style.configure("TCombobox", foreground=theme["entry_fg"])
+    style.map("TCombobox", fieldbackground=[("readonly", theme["entry_bg"])],
+              foreground=[("readonly", theme["entry_fg"])])
+    style.configure("TButton", background=theme["button_bg"], foreground=theme["button_fg"])
+    style.map("TButton", background=[("active", theme["button_active_bg"])],
+              foreground=[("active", theme["button_active_fg"])])
+    for name in ("TCheckbutton", "TRadiobutton"):
+        style.configure(name, indicatorbackground=theme["entry_bg"])
+        style.map(name, background=[("active", theme["bg"])])
+    style.configure("Header.TFrame", background=theme["header_bg"])
+    style.configure("Header.TLabel", background=theme["header_bg"])
+    style.configure("TNotebook", background=theme["bg"])
+    style.configure("TNotebook.Tab", background=theme["button_bg"], foreground=theme["button_fg"])
+    style.map("TNotebook.Tab", background=[("selected", theme["button_active_bg"])],
+              foreground=[("selected", theme["button_active_fg"])])
+    style.configure("Treeview", background=theme["entry_bg"], fieldbackground=theme["entry_bg"],
+                    foreground=theme["entry_fg"])
+    style.configure("Treeview.Heading", background=theme["button_bg"], foreground=theme["button_fg"])
+
+
+# Function to switch every window to a theme
+def apply_theme(name):
+    load_theme_colors(name)
+    theme = themes[name]
+    configure_styles(theme)
+    
+    # The few classic widgets are configured directly
+    for widget, roles in classic_widgets.items():
+        widget.config(**{option: theme[role] for option, role in roles.items()})
+        if isinstance(widget, tk.Canvas):
+            for role in canvas_item_roles:
+                widget.itemconfigure("theme_" + role, fill=theme[role])
     
     # Update background pattern
     create_pattern_background(main_canvas, root.winfo_width(), qr_code_generator_frame.winfo_height(), "dots")
 
 
-# Helper function to update widget colors
-def update_widget_colors(widget):
-    if isinstance(widget, tk.Label):
-        widget.config(bg=bg_color, fg=fg_color)
-    elif isinstance(widget, tk.Button):
-        widget.config(bg=button_bg_color, fg=button_fg_color, 
-                     activebackground=button_active_bg, activeforeground=button_active_fg)
-    elif isinstance(widget, tk.Entry):
-        widget.config(bg=entry_bg_color, fg=entry_fg_color, insertbackground=fg_color)
-    elif isinstance(widget, tk.Frame):
-        widget.config(bg=bg_color)
-        for child in widget.winfo_children():
-            update_widget_colors(child)
-    elif isinstance(widget, tk.Checkbutton) or isinstance(widget, tk.Radiobutton):
-        widget.config(bg=bg_color, fg=fg_color, selectcolor=entry_bg_color,
-                     activebackground=bg_color, activeforeground=fg_color)
-    elif isinstance(widget, tk.LabelFrame):
-        widget.config(bg=bg_color, fg=fg_color)
-        for child in widget.winfo_children():
-            update_widget_colors(child)
-    elif isinstance(widget, tk.Text):
-        widget.config(bg=entry_bg_color, fg=entry_fg_color, insertbackground=fg_color)
-    elif isinstance(widget, tk.Canvas):
-        widget.config(bg=entry_bg_color)
-    elif isinstance(widget, tk.Menu):
-        # Menu items are more complex, handled separately
-        pass
+# Function to toggle dark mode
+def toggle_dark_mode():
+    apply_theme("light" if current_theme == "dark" else "dark")
 
 
 # Set initial colors
-bg_color = "#F0F0F0"  # Light gray for light mode
-fg_color = "#333333"  # Dark gray text for light mode
-button_bg_color = "#E0E0E0"
-button_fg_color = "#333333"
-entry_bg_color = "#FFFFFF"
-entry_fg_color = "#333333"
-button_active_bg = "#CCCCCC"
-button_active_fg = "#333333"
-accent_color = "#4a84b4"
-header_bg_color = "#DDDDDD"
-
-
-# Function to create decorative background pattern
-def create_pattern_background(canvas, width, height, pattern_type="dots"):
-    canvas.delete("pattern")  # Clear previous pattern
+load_theme_colors("light")
+
+
+# Background pattern tiles (PhotoImages) keyed by (pattern type, theme), drawn on first use.
+# The tile size is a multiple of both the dot and the grid spacing so tiles join seamlessly.
+pattern_tile_size = 360
+pattern_tiles = {}
+
+
+# Function to draw one tile of a decorative background pattern (transparent between dots/lines)
+def draw_pattern_tile(pattern_type, color):
+    tile = Image.new("RGBA", (pattern_tile_size, pattern_tile_size), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(tile)
     
     if pattern_type == "dots":
         # Create a dotted pattern
         dot_spacing = 20
         dot_radius = 2
-        for x in range(0, width, dot_spacing):
-            for y in range(0, height, dot_spacing):
-                # Add some randomness to the pattern
-                offset_x = random.randint(-3, 3)
-                offset_y = random.randint(-3, 3)
-                
-                # Create small dots with color based on current mode
-                dot_color = "#D0D0D0" if not is_dark_mode else "#3A3A3A"
-                canvas.create_oval(
-                    x + offset_x - dot_radius, 
-                    y + offset_y - dot_radius,
-                    x + offset_x + dot_radius, 
-                    y + offset_y + dot_radius,
-                    fill=dot_color, outline="", tags="pattern"
-                )
+        # Add some randomness to the pattern (the same for every tile, so it stays put on resize)
+        rng = random.Random(0)
+        for x in range(dot_spacing // 2, pattern_tile_size, dot_spacing):
+            for y in range(dot_spacing // 2, pattern_tile_size, dot_spacing):
+                cx = x + rng.randint(-3, 3)
+                cy = y + rng.randint(-3, 3)
+                draw.ellipse((cx - dot_radius, cy - dot_radius, cx + dot_radius, cy + dot_radius), fill=color)
     elif pattern_type == "grid":
         # Create a subtle grid pattern
         grid_spacing = 30
-        line_color = "#D0D0D0" if not is_dark_mode else "#3A3A3A"
-        
-        # Horizontal lines
-        for y in range(0, height, grid_spacing):
-            canvas.create_line(0, y, width, y, fill=line_color, width=1, tags="pattern")
-        
-        # Vertical lines
-        for x in range(0, width, grid_spacing):
-            canvas.create_line(x, 0, x, height, fill=line_color, width=1, tags="pattern")
+        for position in range(0, pattern_tile_size, grid_spacing):
+            draw.line((0, position, pattern_tile_size, position), fill=color)
+            draw.line((position, 0, position, pattern_tile_size), fill=color)
+    return tile
+
+
+# Function to get the pattern tile for the current theme
+def pattern_tile(pattern_type):
+    key = (pattern_type, current_theme)
+    if key not in pattern_tiles:
+        pattern_tiles[key] = ImageTk.PhotoImage(draw_pattern_tile(pattern_type, themes[current_theme]["pattern"]))
+    return pattern_tiles[key]
+
+
+# Function to create decorative background pattern.
+# The pattern is a few tiled image items: a resize only adds or removes whole tiles and a
+# theme change only swaps the tile image.
+def create_pattern_background(canvas, width, height, pattern_type="dots"):
+    tile = pattern_tile(pattern_type)
+    columns = max(1, -(-width // pattern_tile_size))
+    rows = max(1, -(-height // pattern_tile_size))
+    
+    # Drop tiles that are now outside the window, and point the others at the current tile
+    covered = set()
+    for item in canvas.find_withtag("pattern"):
+        x, y = canvas.coords(item)
+        cell = (int(x) // pattern_tile_size, int(y) // pattern_tile_size)
+        if cell[0] >= columns or cell[1] >= rows:
+            canvas.delete(item)
+        else:
+            covered.add(cell)
+    canvas.itemconfigure("pattern", image=tile)
+    
+    # Add the tiles the window has grown into
+    for column in range(columns):
+        for row in range(rows):
+            if (column, row) not in covered:
+                canvas.create_image(column * pattern_tile_size, row * pattern_tile_size, image=tile,
+                                    anchor="nw", tags="pattern")
+    canvas.tag_lower("pattern")
 
 
 # Create the main window
 root = tk.Tk()
 root.title("QR Code Generator")
 root.geometry("700x600")
-root.config(bg=bg_color)
+theme_widget(root, bg="bg")
+
+# Named ttk styles, colored by apply_theme; clam honors background and field colors on every platform
+style = ttk.Style()
+style.theme_use("clam")
+style.configure("Compact.TButton", padding=(5, 0))
+style.configure("Large.TButton", padding=(5, 10))
+style.configure("TNotebook.Tab", padding=[10, 2])
 
 # Create menu bar
 menubar = tk.Menu(root)
@@ -1431,12 +1599,8 @@ file_menu.add_cascade(label="Export Format", menu=format_menu)
 
 # Define format variable and options
 format_var = tk.StringVar(value="PNG")
-format_menu.add_radiobutton(label="PNG", variable=format_var, value="PNG", 
-                           command=lambda: setattr(globals(), 'qr_format', "PNG"))
-format_menu.add_radiobutton(label="JPEG", variable=format_var, value="JPEG", 
-                           command=lambda: setattr(globals(), 'qr_format', "JPEG"))
-format_menu.add_radiobutton(label="PDF", variable=format_var, value="PDF", 
-                           command=lambda: setattr(globals(), 'qr_format', "PDF"))
+for format_name in ("PNG", "JPEG", "PDF", "SVG", "EPS"):
+    format_menu.add_radiobutton(label=format_name, variable=format_var, value=format_name)
 
 file_menu.add_separator()
 file_menu.add_command(label="Exit", command=root.quit)
@@ -1445,6 +1609,7 @@ file_menu.add_command(label="Exit", command=root.quit)
 tools_menu = tk.Menu(menubar, tearoff=0)
 menubar.add_cascade(label="Tools", menu=tools_menu)
 tools_menu.add_command(label="Analytics", command=show_analytics)
+tools_menu.add_command(label="Scan QR Code", command=scan_qr_code)
 tools_menu.add_command(label="Database Viewer", command=view_database)  # Everyone sees the option
 tools_menu.add_command(label="Export Database", command=export_database)  # Everyone sees the option
 
@@ -1477,364 +1642,336 @@ help_menu.add_command(label="About", command=lambda: messagebox.showinfo("About"
                                                                       "A full-featured QR code generation tool"))
 
 # Header Label with accent background
-header_frame = tk.Frame(root, bg=header_bg_color, height=60)
+header_frame = ttk.Frame(root, height=60, style="Header.TFrame")
 header_frame.pack(fill="x")
 
-header_label = tk.Label(header_frame, text="QR CODE GENERATOR", font=("Arial", 18, "bold"), 
-                        bg=header_bg_color, fg=fg_color, pady=10)
+header_label = ttk.Label(header_frame, text="QR CODE GENERATOR", font=("Arial", 18, "bold"),
+                         padding=(0, 10), style="Header.TLabel")
 header_label.pack()
 
 # ---------------- Login Frame ----------------
-login_frame = tk.Frame(root, bg=bg_color)
+login_frame = ttk.Frame(root)
 login_frame.pack(pady=10)
 
 # Create a frame for login controls with some styling
-login_box = tk.Frame(login_frame, bg=bg_color, bd=2, relief="groove", padx=20, pady=15)
+login_box = ttk.Frame(login_frame, borderwidth=2, relief="groove", padding=(20, 15))
 login_box.pack(pady=30)
 
-tk.Label(login_box, text="Welcome to QR Code Generator", font=("Arial", 12, "bold"), 
-        bg=bg_color, fg=fg_color).pack(pady=(0, 15))
+ttk.Label(login_box, text="Welcome to QR Code Generator", font=("Arial", 12, "bold")).pack(pady=(0, 15))
 
-tk.Label(login_box, text="Username:", bg=bg_color, fg=fg_color).pack(anchor="w")
-username_entry = tk.Entry(login_box, width=25, bg=entry_bg_color, fg=entry_fg_color)
+ttk.Label(login_box, text="Username:").pack(anchor="w")
+username_entry = ttk.Entry(login_box, width=25)
 username_entry.pack(fill="x", pady=(0, 10))
 
-tk.Label(login_box, text="Password:", bg=bg_color, fg=fg_color).pack(anchor="w")
-password_entry = tk.Entry(login_box, width=25, show="*", bg=entry_bg_color, fg=entry_fg_color)
+ttk.Label(login_box, text="Password:").pack(anchor="w")
+password_entry = ttk.Entry(login_box, width=25, show="*")
 password_entry.pack(fill="x", pady=(0, 15))
 
-login_button = tk.Button(login_box, text="Login", command=login, 
-                        bg=button_bg_color, fg=button_fg_color,
-                        activebackground=button_active_bg, activeforeground=button_active_fg,
-                        width=10, height=1, bd=1)
+login_button = ttk.Button(login_box, text="Login", command=login, width=10)
 login_button.pack(pady=(0, 5))
 
-signup_button = tk.Button(login_box, text="Sign Up", command=open_signup,
-                        bg=button_bg_color, fg=button_fg_color,
-                        activebackground=button_active_bg, activeforeground=button_active_fg,
-                        width=10, height=1, bd=1)
+signup_button = ttk.Button(login_box, text="Sign Up", command=open_signup, width=10)
 signup_button.pack()
 
 # Add admin login hint 
-admin_hint = tk.Label(login_frame, text="Powered By RAN (C)", 
-                       font=("Arial", 8), bg=bg_color, fg=fg_color)
+admin_hint = ttk.Label(login_frame, text="Powered By RAN (C)", font=("Arial", 8))
 admin_hint.pack(pady=(5, 0))
 
 # ---------------- Sign-Up Frame ----------------
-signup_frame = tk.Frame(root, bg=bg_color)
+signup_frame = ttk.Frame(root)
 
 # Create a frame for signup controls with some styling
-signup_box = tk.Frame(signup_frame, bg=bg_color, bd=2, relief="groove", padx=20, pady=15)
+signup_box = ttk.Frame(signup_frame, borderwidth=2, relief="groove", padding=(20, 15))
 signup_box.pack(pady=30)
 
-tk.Label(signup_box, text="Create a New Account", font=("Arial", 12, "bold"), 
-        bg=bg_color, fg=fg_color).pack(pady=(0, 15))
+ttk.Label(signup_box, text="Create a New Account", font=("Arial", 12, "bold")).pack(pady=(0, 15))
 
-tk.Label(signup_box, text="Username:", bg=bg_color, fg=fg_color).pack(anchor="w")
-signup_username_entry = tk.Entry(signup_box, width=25, bg=entry_bg_color, fg=entry_fg_color)
+ttk.Label(signup_box, text="Username:").pack(anchor="w")
+signup_username_entry = ttk.Entry(signup_box, width=25)
 signup_username_entry.pack(fill="x", pady=(0, 10))
 
-tk.Label(signup_box, text="Password:", bg=bg_color, fg=fg_color).pack(anchor="w")
-signup_password_entry = tk.Entry(signup_box, width=25, show="*", bg=entry_bg_color, fg=entry_fg_color)
+ttk.Label(signup_box, text="Password:").pack(anchor="w")
+signup_password_entry = ttk.Entry(signup_box, width=25, show="*")
 signup_password_entry.pack(fill="x", pady=(0, 10))
 
-tk.Label(signup_box, text="Confirm Password:", bg=bg_color, fg=fg_color).pack(anchor="w")
-signup_confirm_password_entry = tk.Entry(signup_box, width=25, show="*", bg=entry_bg_color, fg=entry_fg_color)
+ttk.Label(signup_box, text="Confirm Password:").pack(anchor="w")
+signup_confirm_password_entry = ttk.Entry(signup_box, width=25, show="*")
 signup_confirm_password_entry.pack(fill="x", pady=(0, 15))
 
-signup_submit_button = tk.Button(signup_box, text="Sign Up", command=signup,
-                                bg=button_bg_color, fg=button_fg_color,
-                                activebackground=button_active_bg, activeforeground=button_active_fg,
-                                width=10, height=1, bd=1)
+signup_submit_button = ttk.Button(signup_box, text="Sign Up", command=signup, width=10)
 signup_submit_button.pack(pady=(0, 5))
 
-back_button = tk.Button(signup_box, text="Back to Login", command=back_to_login,
-                        bg=button_bg_color, fg=button_fg_color,
-                        activebackground=button_active_bg, activeforeground=button_active_fg,
-                        width=10, height=1, bd=1)
+back_button = ttk.Button(signup_box, text="Back to Login", command=back_to_login, width=10)
 back_button.pack()
 
 # ---------------- Scrollable Canvas for QR Generator ----------------
-main_canvas = tk.Canvas(root, bg=bg_color, highlightthickness=0)
-y_scrollbar = tk.Scrollbar(root, orient="vertical", command=main_canvas.yview)
+main_canvas = theme_widget(tk.Canvas(root, highlightthickness=0), bg="bg")
+y_scrollbar = ttk.Scrollbar(root, orient="vertical", command=main_canvas.yview)
 y_scrollbar.pack(side="right", fill="y")
 main_canvas.configure(yscrollcommand=y_scrollbar.set)
 
 # Create a frame inside the canvas for all QR generator content
-qr_code_generator_frame = tk.Frame(main_canvas, bg=bg_color)
+qr_code_generator_frame = ttk.Frame(main_canvas)
 main_canvas.create_window((0, 0), window=qr_code_generator_frame, anchor="nw", tags="qr_generator")
 
 # Top bar with utilities
-util_frame = tk.Frame(qr_code_generator_frame, bg=header_bg_color, height=40)
+util_frame = ttk.Frame(qr_code_generator_frame, height=40, style="Header.TFrame")
 util_frame.pack(fill="x")
 
-history_button = tk.Button(util_frame, text="History", command=show_history,
-                        bg=button_bg_color, fg=button_fg_color,
-                        activebackground=button_active_bg, activeforeground=button_active_fg)
+history_button = ttk.Button(util_frame, text="History", command=show_history)
 history_button.pack(side="left", padx=10, pady=5)
 
-analytics_button = tk.Button(util_frame, text="Analytics", command=show_analytics,
-                           bg=button_bg_color, fg=button_fg_color,
-                           activebackground=button_active_bg, activeforeground=button_active_fg)
+analytics_button = ttk.Button(util_frame, text="Analytics", command=show_analytics)
 analytics_button.pack(side="left", padx=10, pady=5)
 
-db_viewer_button = tk.Button(util_frame, text="Database", command=view_database,  # Everyone can see the button
-                           bg=button_bg_color, fg=button_fg_color,
-                           activebackground=button_active_bg, activeforeground=button_active_fg)
+db_viewer_button = ttk.Button(util_frame, text="Database", command=view_database)  # Everyone can see the button
 db_viewer_button.pack(side="left", padx=10, pady=5)
 
-dark_mode_button = tk.Button(util_frame, text="Toggle Dark Mode", command=toggle_dark_mode,
-                        bg=button_bg_color, fg=button_fg_color,
-                        activebackground=button_active_bg, activeforeground=button_active_fg)
+dark_mode_button = ttk.Button(util_frame, text="Toggle Dark Mode", command=toggle_dark_mode)
 dark_mode_button.pack(side="right", padx=10, pady=5)
 
-logout_button = tk.Button(util_frame, text="Log Out", 
-                         command=lambda: [main_canvas.pack_forget(), login_frame.pack()],
-                         bg=button_bg_color, fg=button_fg_color,
-                         activebackground=button_active_bg, activeforeground=button_active_fg)
+logout_button = ttk.Button(util_frame, text="Log Out",
+                           command=lambda: [main_canvas.pack_forget(), login_frame.pack()])
 logout_button.pack(side="right", padx=10, pady=5)
 
-# Create a custom style for the notebook tabs
-style = ttk.Style()
-style.configure('TNotebook', background=bg_color)
-style.configure('TNotebook.Tab', background=button_bg_color, foreground=button_fg_color, padding=[10, 2])
-style.map('TNotebook.Tab', background=[('selected', button_active_bg)], 
-         foreground=[('selected', button_active_fg)])
+# Color the named styles for the starting theme
+configure_styles(themes[current_theme])
 
 # Container for tabs and QR display in a 2-column layout
-content_frame = tk.Frame(qr_code_generator_frame, bg=bg_color)
+content_frame = ttk.Frame(qr_code_generator_frame)
 content_frame.pack(fill="both", expand=True, padx=10, pady=5)
 
 # Left column for tabs
-tabs_frame = tk.Frame(content_frame, bg=bg_color)
+tabs_frame = ttk.Frame(content_frame)
 tabs_frame.pack(side="left", fill="both", expand=True, padx=(0, 5))
 
-# QR Code Tabs - Using ttk Notebook but regular frames for the tabs
+# QR Code Tabs
 qr_tabs = ttk.Notebook(tabs_frame)
 qr_tabs.pack(fill="both", expand=True)
 
 # URL Tab
-url_tab = tk.Frame(qr_tabs, bg=bg_color)
+url_tab = ttk.Frame(qr_tabs)
 qr_tabs.add(url_tab, text="URL")
 
-tk.Label(url_tab, text="Enter URL:", bg=bg_color, fg=fg_color).pack(pady=(10, 5), anchor="w")
-url_entry = tk.Entry(url_tab, width=40, bg=entry_bg_color, fg=entry_fg_color)
+ttk.Label(url_tab, text="Enter URL:").pack(pady=(10, 5), anchor="w")
+url_entry = ttk.Entry(url_tab, width=40)
 url_entry.pack(fill="x", padx=10)
-tk.Button(url_tab, text="Generate QR Code", command=lambda: generate_qr(event_type='url'),
-         bg=button_bg_color, fg=button_fg_color,
-         activebackground=button_active_bg, activeforeground=button_active_fg).pack(pady=10)
+ttk.Button(url_tab, text="Generate QR Code", command=lambda: generate_qr(event_type='url')).pack(pady=10)
 
 # Text Tab
-text_tab = tk.Frame(qr_tabs, bg=bg_color)
+text_tab = ttk.Frame(qr_tabs)
 qr_tabs.add(text_tab, text="Text")
 
-tk.Label(text_tab, text="Enter Text:", bg=bg_color, fg=fg_color).pack(pady=(10, 5), anchor="w")
-text_entry = tk.Entry(text_tab, width=40, bg=entry_bg_color, fg=entry_fg_color)
+ttk.Label(text_tab, text="Enter Text:").pack(pady=(10, 5), anchor="w")
+text_entry = ttk.Entry(text_tab, width=40)
 text_entry.pack(fill="x", padx=10)
-tk.Button(text_tab, text="Generate QR Code", command=lambda: generate_qr(event_type='text'),
-         bg=button_bg_color, fg=button_fg_color,
-         activebackground=button_active_bg, activeforeground=button_active_fg).pack(pady=10)
+ttk.Button(text_tab, text="Generate QR Code", command=lambda: generate_qr(event_type='text')).pack(pady=10)
 
 # Event Tab
-event_tab = tk.Frame(qr_tabs, bg=bg_color)
+event_tab = ttk.Frame(qr_tabs)
 qr_tabs.add(event_tab, text="Event")
 
-tk.Label(event_tab, text="Event Date (YYYY-MM-DD):", bg=bg_color, fg=fg_color).pack(pady=(10, 2), anchor="w")
-event_date_entry = tk.Entry(event_tab, width=40, bg=entry_bg_color, fg=entry_fg_color)
+ttk.Label(event_tab, text="Event Date (YYYY-MM-DD):").pack(pady=(10, 2), anchor="w")
+event_date_entry = ttk.Entry(event_tab, width=40)
 event_date_entry.pack(fill="x", padx=10)
 
-tk.Label(event_tab, text="Event Time (HH:MM):", bg=bg_color, fg=fg_color).pack(pady=(5, 2), anchor="w")
-event_time_entry = tk.Entry(event_tab, width=40, bg=entry_bg_color, fg=entry_fg_color)
+ttk.Label(event_tab, text="Event Time (HH:MM):").pack(pady=(5, 2), anchor="w")
+event_time_entry = ttk.Entry(event_tab, width=40)
 event_time_entry.pack(fill="x", padx=10)
 
-tk.Label(event_tab, text="Event Details:", bg=bg_color, fg=fg_color).pack(pady=(5, 2), anchor="w")
-event_details_entry = tk.Entry(event_tab, width=40, bg=entry_bg_color, fg=entry_fg_color)
+ttk.Label(event_tab, text="Event Details:").pack(pady=(5, 2), anchor="w")
+event_details_entry = ttk.Entry(event_tab, width=40)
 event_details_entry.pack(fill="x", padx=10)
 
-tk.Label(event_tab, text="Event Location:", bg=bg_color, fg=fg_color).pack(pady=(5, 2), anchor="w")
-event_location_entry = tk.Entry(event_tab, width=40, bg=entry_bg_color, fg=entry_fg_color)
+ttk.Label(event_tab, text="Event Location:").pack(pady=(5, 2), anchor="w")
+event_location_entry = ttk.Entry(event_tab, width=40)
 event_location_entry.pack(fill="x", padx=10)
 
-tk.Button(event_tab, text="Generate QR Code", command=lambda: generate_qr(event_type='event'),
-         bg=button_bg_color, fg=button_fg_color,
-         activebackground=button_active_bg, activeforeground=button_active_fg).pack(pady=10)
+ttk.Button(event_tab, text="Generate QR Code", command=lambda: generate_qr(event_type='event')).pack(pady=10)
 
 # Contact Tab
-contact_tab = tk.Frame(qr_tabs, bg=bg_color)
+contact_tab = ttk.Frame(qr_tabs)
 qr_tabs.add(contact_tab, text="Contact")
 
-tk.Label(contact_tab, text="Name:", bg=bg_color, fg=fg_color).pack(pady=(10, 2), anchor="w")
-contact_name_entry = tk.Entry(contact_tab, width=40, bg=entry_bg_color, fg=entry_fg_color)
+ttk.Label(contact_tab, text="Name:").pack(pady=(10, 2), anchor="w")
+contact_name_entry = ttk.Entry(contact_tab, width=40)
 contact_name_entry.pack(fill="x", padx=10)
 
-tk.Label(contact_tab, text="Phone:", bg=bg_color, fg=fg_color).pack(pady=(5, 2), anchor="w")
-contact_phone_entry = tk.Entry(contact_tab, width=40, bg=entry_bg_color, fg=entry_fg_color)
+ttk.Label(contact_tab, text="Phone:").pack(pady=(5, 2), anchor="w")
+contact_phone_entry = ttk.Entry(contact_tab, width=40)
 contact_phone_entry.pack(fill="x", padx=10)
 
-tk.Label(contact_tab, text="Email:", bg=bg_color, fg=fg_color).pack(pady=(5, 2), anchor="w")
-contact_email_entry = tk.Entry(contact_tab, width=40, bg=entry_bg_color, fg=entry_fg_color)
+ttk.Label(contact_tab, text="Email:").pack(pady=(5, 2), anchor="w")
+contact_email_entry = ttk.Entry(contact_tab, width=40)
 contact_email_entry.pack(fill="x", padx=10)
 
-tk.Button(contact_tab, text="Generate QR Code", command=lambda: generate_qr(event_type='contact'),
-         bg=button_bg_color, fg=button_fg_color,
-         activebackground=button_active_bg, activeforeground=button_active_fg).pack(pady=10)
+ttk.Button(contact_tab, text="Generate QR Code", command=lambda: generate_qr(event_type='contact')).pack(pady=10)
 
 # Wi-Fi Tab
-wifi_tab = tk.Frame(qr_tabs, bg=bg_color)
+wifi_tab = ttk.Frame(qr_tabs)
 qr_tabs.add(wifi_tab, text="Wi-Fi")
 
-tk.Label(wifi_tab, text="SSID (Network Name):", bg=bg_color, fg=fg_color).pack(pady=(10, 2), anchor="w")
-wifi_ssid_entry = tk.Entry(wifi_tab, width=40, bg=entry_bg_color, fg=entry_fg_color)
+ttk.Label(wifi_tab, text="SSID (Network Name):").pack(pady=(10, 2), anchor="w")
+wifi_ssid_entry = ttk.Entry(wifi_tab, width=40)
 wifi_ssid_entry.pack(fill="x", padx=10)
 
-tk.Label(wifi_tab, text="Password:", bg=bg_color, fg=fg_color).pack(pady=(5, 2), anchor="w")
-wifi_password_entry = tk.Entry(wifi_tab, width=40, show="*", bg=entry_bg_color, fg=entry_fg_color)
+ttk.Label(wifi_tab, text="Password:").pack(pady=(5, 2), anchor="w")
+wifi_password_entry = ttk.Entry(wifi_tab, width=40, show="*")
 wifi_password_entry.pack(fill="x", padx=10)
 
-tk.Label(wifi_tab, text="Security Type:", bg=bg_color, fg=fg_color).pack(pady=(5, 2), anchor="w")
+ttk.Label(wifi_tab, text="Security Type:").pack(pady=(5, 2), anchor="w")
 wifi_security_var = tk.StringVar(value="WPA")
-security_frame = tk.Frame(wifi_tab, bg=bg_color)
+security_frame = ttk.Frame(wifi_tab)
 security_frame.pack(pady=5, anchor="w", padx=10)
 
-tk.Radiobutton(security_frame, text="WPA/WPA2", variable=wifi_security_var, value="WPA",
-              bg=bg_color, fg=fg_color, selectcolor=entry_bg_color,
-              activebackground=bg_color, activeforeground=fg_color).pack(side="left", padx=5)
-tk.Radiobutton(security_frame, text="WEP", variable=wifi_security_var, value="WEP",
-              bg=bg_color, fg=fg_color, selectcolor=entry_bg_color,
-              activebackground=bg_color, activeforeground=fg_color).pack(side="left", padx=5)
-tk.Radiobutton(security_frame, text="None", variable=wifi_security_var, value="nopass",
-              bg=bg_color, fg=fg_color, selectcolor=entry_bg_color,
-              activebackground=bg_color, activeforeground=fg_color).pack(side="left", padx=5)
+ttk.Radiobutton(security_frame, text="WPA/WPA2", variable=wifi_security_var, value="WPA").pack(side="left", padx=5)
+ttk.Radiobutton(security_frame, text="WEP", variable=wifi_security_var, value="WEP").pack(side="left", padx=5)
+ttk.Radiobutton(security_frame, text="None", variable=wifi_security_var, value="nopass").pack(side="left", padx=5)
 
-tk.Button(wifi_tab, text="Generate QR Code", command=lambda: generate_qr(event_type='wifi'),
-         bg=button_bg_color, fg=button_fg_color,
-         activebackground=button_active_bg, activeforeground=button_active_fg).pack(pady=10)
+ttk.Button(wifi_tab, text="Generate QR Code", command=lambda: generate_qr(event_type='wifi')).pack(pady=10)
 
 # Right column for QR code display
-display_frame = tk.Frame(content_frame, bg=bg_color)
+display_frame = ttk.Frame(content_frame)
 display_frame.pack(side="right", fill="both", expand=True, padx=(5, 0))
 
 # QR Code Display
-qr_display_frame = tk.LabelFrame(display_frame, text="Generated QR Code", 
-                                bg=bg_color, fg=fg_color)
+qr_display_frame = ttk.Labelframe(display_frame, text="Generated QR Code")
 qr_display_frame.pack(pady=5, fill="both", expand=True)
 
-qr_label = tk.Label(qr_display_frame, bg=bg_color)
+qr_label = ttk.Label(qr_display_frame)
 qr_label.pack(pady=5, padx=5)
 
 # Capacity info label
-capacity_info_label = tk.Label(qr_display_frame, text="Data: 0 chars - QR Version ~1 - Usage: 0.0%",
-                              bg=bg_color, fg=fg_color, font=("Arial", 8))
-capacity_info_label.pack(pady=(0, 5))
+capacity_info_label = ttk.Label(qr_display_frame, text="Data: 0 chars - QR Version 1 - Usage: 0.0%",
+                                font=("Arial", 8))
+capacity_info_label.pack(pady=(0, 2))
+
+# Live gauge of how close the data is to the largest QR code (version 40) at the selected ECC
+capacity_gauge = ttk.Progressbar(qr_display_frame, length=200, maximum=100, mode="determinate")
+capacity_gauge.pack(pady=(0, 5))
+
+# Result of the background scan check of the generated QR code
+verify_label = ttk.Label(qr_display_frame, text="", font=("Arial", 8))
+verify_label.pack(pady=(0, 5))
 
 # Button frame for QR code actions
-button_frame = tk.Frame(display_frame, bg=bg_color)
+button_frame = ttk.Frame(display_frame)
 button_frame.pack(pady=5)
 
 # Save button
-save_button = tk.Button(button_frame, text="Save QR Code", command=save_qr_code,
-                      bg=button_bg_color, fg=button_fg_color,
-                      activebackground=button_active_bg, activeforeground=button_active_fg)
+save_button = ttk.Button(button_frame, text="Save QR Code", command=save_qr_code)
 save_button.pack(side="left", padx=5)
 
 # Share button (initially disabled)
-share_button = tk.Button(button_frame, text="Share", command=share_qr_code,
-                       bg=button_bg_color, fg=button_fg_color,
-                       activebackground=button_active_bg, activeforeground=button_active_fg,
-                       state="disabled")
+share_button = ttk.Button(button_frame, text="Share", command=share_qr_code, state="disabled")
 share_button.pack(side="left", padx=5)
 
 
 # Template selection frame
-template_frame = tk.Frame(qr_code_generator_frame, bg=bg_color)
+template_frame = ttk.Frame(qr_code_generator_frame)
 template_frame.pack(pady=2, fill="x", padx=10)
 
-tk.Label(template_frame, text="Template:", bg=bg_color, fg=fg_color).pack(side="left", padx=2)
+ttk.Label(template_frame, text="Template:").pack(side="left", padx=2)
 template_var = tk.StringVar(value="Standard")
 template_menu = ttk.Combobox(template_frame, textvariable=template_var, 
                            values=list(qr_templates.keys()), width=15, state="readonly")
 template_menu.pack(side="left", padx=2)
 
-apply_button = tk.Button(template_frame, text="Apply", command=apply_template,
-                       bg=button_bg_color, fg=button_fg_color,
-                       activebackground=button_active_bg, activeforeground=button_active_fg,
-                       padx=5, pady=0)
+apply_button = ttk.Button(template_frame, text="Apply", command=apply_template, style="Compact.TButton")
 apply_button.pack(side="left", padx=5)
 
 # Customization Frame at the bottom
-customization_frame = tk.LabelFrame(qr_code_generator_frame, text="Customization Options", 
-                                   bg=bg_color, fg=fg_color)
+customization_frame = ttk.Labelframe(qr_code_generator_frame, text="Customization Options")
 customization_frame.pack(pady=5, fill="x", padx=10)
 
 # Create a more compact layout for customization options
-options_frame = tk.Frame(customization_frame, bg=bg_color)
+options_frame = ttk.Frame(customization_frame)
 options_frame.pack(pady=5, padx=5, fill="x")
 
 # Organize options in a more compact grid
-row1_frame = tk.Frame(options_frame, bg=bg_color)
+row1_frame = ttk.Frame(options_frame)
 row1_frame.pack(fill="x", pady=2)
-row1_frame = tk.Frame(options_frame, bg=bg_color)
+row1_frame = ttk.Frame(options_frame)
 row1_frame.pack(fill="x", pady=2)
 
-tk.Label(row1_frame, text="FG Color:", bg=bg_color, fg=fg_color, width=10, anchor="e").pack(side="left", padx=2)
+ttk.Label(row1_frame, text="FG Color:", width=10, anchor="e").pack(side="left", padx=2)
 fg_color_var = tk.StringVar(value="Black")
 fg_color_menu = ttk.Combobox(row1_frame, textvariable=fg_color_var, 
                            values=list(foreground_colors.keys()), width=12, state="readonly")
 fg_color_menu.pack(side="left", padx=2)
 
-tk.Label(row1_frame, text="BG Color:", bg=bg_color, fg=fg_color, width=10, anchor="e").pack(side="left", padx=2)
+ttk.Label(row1_frame, text="BG Color:", width=10, anchor="e").pack(side="left", padx=2)
 bg_color_var = tk.StringVar(value="White")
 bg_color_menu = ttk.Combobox(row1_frame, textvariable=bg_color_var, 
                            values=list(background_colors.keys()), width=12, state="readonly")
 bg_color_menu.pack(side="left", padx=2)
 
-row2_frame = tk.Frame(options_frame, bg=bg_color)
+row2_frame = ttk.Frame(options_frame)
 row2_frame.pack(fill="x", pady=2)
 
-tk.Label(row2_frame, text="Box Size:", bg=bg_color, fg=fg_color, width=10, anchor="e").pack(side="left", padx=2)
+ttk.Label(row2_frame, text="Box Size:", width=10, anchor="e").pack(side="left", padx=2)
 box_sizes = ["5", "6", "7", "8", "9", "10"]
 box_size_var = tk.StringVar(value="5")
 box_size_menu = ttk.Combobox(row2_frame, textvariable=box_size_var, values=box_sizes, width=12, state="readonly")
 box_size_menu.pack(side="left", padx=2)
 
-tk.Label(row2_frame, text="Border:", bg=bg_color, fg=fg_color, width=10, anchor="e").pack(side="left", padx=2)
+ttk.Label(row2_frame, text="Border:", width=10, anchor="e").pack(side="left", padx=2)
 border_sizes = ["2", "3", "4", "5", "6"]
 border_size_var = tk.StringVar(value="2")
 border_size_menu = ttk.Combobox(row2_frame, textvariable=border_size_var, values=border_sizes, width=12, state="readonly")
 border_size_menu.pack(side="left", padx=2)
 
-row3_frame = tk.Frame(options_frame, bg=bg_color)
+row3_frame = ttk.Frame(options_frame)
 row3_frame.pack(fill="x", pady=2)
 
-tk.Label(row3_frame, text="ECC:", bg=bg_color, fg=fg_color, width=10, anchor="e").pack(side="left", padx=2)
+ttk.Label(row3_frame, text="ECC:", width=10, anchor="e").pack(side="left", padx=2)
 error_levels = ["L (7%)", "M (15%)", "Q (25%)", "H (30%)"]
 error_correction_var = tk.StringVar(value="M (15%)")
 error_menu = ttk.Combobox(row3_frame, textvariable=error_correction_var, values=error_levels, width=12, state="readonly")
 error_menu.pack(side="left", padx=2)
 
 # Logo options in a more compact row
-logo_frame = tk.Frame(customization_frame, bg=bg_color)
+logo_frame = ttk.Frame(customization_frame)
 logo_frame.pack(pady=2, fill="x")
 
 add_logo_var = tk.BooleanVar(value=False)
-tk.Checkbutton(logo_frame, text="Add Logo", variable=add_logo_var, 
-              bg=bg_color, fg=fg_color, selectcolor=entry_bg_color,
-              activebackground=bg_color, activeforeground=fg_color).pack(side="left", padx=2)
+ttk.Checkbutton(logo_frame, text="Add Logo", variable=add_logo_var).pack(side="left", padx=2)
 
 
-select_logo_button = tk.Button(logo_frame, text="Select Logo", command=select_logo,
-                              bg=button_bg_color, fg=button_fg_color,
-                              activebackground=button_active_bg, activeforeground=button_active_fg,
-                              padx=5, pady=0)
+select_logo_button = ttk.Button(logo_frame, text="Select Logo", command=select_logo, style="Compact.TButton")
 select_logo_button.pack(side="left", padx=2)
 
-logo_label = tk.Label(logo_frame, text="No logo selected", bg=bg_color, fg=fg_color)
+logo_label = ttk.Label(logo_frame, text="No logo selected")
 logo_label.pack(side="left", padx=2)
 
+# Decode each generated code in the background to make sure it still scans (needs the scanner libraries)
+verify_var = tk.BooleanVar(value=scanner_available)
+ttk.Checkbutton(logo_frame, text="Verify Scan", variable=verify_var,
+                state="normal" if scanner_available else "disabled").pack(side="left", padx=2)
+
+# Re-render the QR code in the background as the user types
+live_preview_var = tk.BooleanVar(value=True)
+ttk.Checkbutton(logo_frame, text="Live Preview", variable=live_preview_var,
+                command=schedule_preview).pack(side="left", padx=2)
+
+# QR type for each tab, in tab order
+qr_tab_types = ['url', 'text', 'event', 'contact', 'wifi']
+
+# Update the capacity gauge and the live preview on every keystroke, tab change and style change
+for tab in [url_tab, text_tab, event_tab, contact_tab, wifi_tab]:
+    for child in tab.winfo_children():
+        if isinstance(child, ttk.Entry):
+            child.bind("<KeyRelease>", on_input_changed)
+qr_tabs.bind("<<NotebookTabChanged>>", on_input_changed)
+for var in [error_correction_var, wifi_security_var, fg_color_var, bg_color_var, box_size_var,
+            border_size_var, add_logo_var]:
+    var.trace_add("write", lambda *args: on_input_changed())
+
 # Function to update canvas scroll region whenever the window size changes
 def update_scroll_region(event=None):
     qr_code_generator_frame.update_idletasks()
-    main_canvas.config(scrollregion=main_canvas.bbox("all"))
+    # Scroll over the generator only (the pattern tiles can reach past it)
+    main_canvas.config(scrollregion=main_canvas.bbox("qr_generator"))
     
     # Also update background pattern if it exists
     if hasattr(root, 'winfo_width'):
@@ -1850,5 +1987,6 @@ def _on_mousewheel(event):
 main_canvas.bind_all("<MouseWheel>", _on_mousewheel)
 
 # Run Tkinter
-root.protocol("WM_DELETE_WINDOW", lambda: [conn.close(), root.destroy()])  # Close DB connection on window close
-root.mainloop()
\ No newline at end of file
+root.protocol("WM_DELETE_WINDOW", lambda: [stop_writer(), conn.close(), root.destroy()])  # Flush queued writes and close DB connection on window close
+root.mainloop()
+stop_writer()  # Also flush when leaving through File > Exit
\ No newline at end of file
@@ -0,0 +1,227 @@
+# Micro-benchmarks for the QR code engine.
+#
+# Usage:
+#   python benchmark.py raster        # module-by-module drawing vs NumPy rasterizer
+#   python benchmark.py encode        # qrcode mask selection vs vectorized masks, versions 1-40
+#   python benchmark.py db            # user_data.db queries on 1M rows, before vs after migrations
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import qrcode
+import qr_engine
+import qr_storage
+from qr_capacity import MODE_8BIT_BYTE, max_chars, plan_segments
+
+
+# Function to time a callable and return the best of several runs in milliseconds
+def best_time(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - start) * 1000
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+# Benchmark: qrcode PIL backend drawing vs the NumPy rasterizer (Standard pattern)
+def bench_raster(args):
+    if not qr_engine.numpy_available:
+        print("NumPy is not installed - nothing to compare against")
+        return 1
+
+    print(f"{'version':>7} {'box':>4} {'pixels':>11} {'qrcode (ms)':>12} {'numpy (ms)':>11} {'speedup':>8}")
+    for version in args.versions:
+        # A short payload with a minimum version gives a matrix of exactly that version
+        matrix = qr_engine.encode_matrix("benchmark", qr_engine.resolve_error_correction("M"), version)
+        for box_size in args.box_sizes:
+            settings = qr_engine.resolve_style({"fg": "Navy", "bg": "White", "box_size": box_size, "border": 4})
+
+            drawn = qr_engine.draw_matrix(matrix, settings)
+            rasterized = qr_engine.rasterize_matrix(matrix, settings)
+            if drawn.tobytes() != rasterized.tobytes():
+                print(f"Output differs for version {version}, box size {box_size}")
+                return 1
+
+            old_ms = best_time(lambda: qr_engine.draw_matrix(matrix, settings), args.repeat)
+            new_ms = best_time(lambda: qr_engine.rasterize_matrix(matrix, settings), args.repeat)
+            pixels = f"{drawn.size[0]}x{drawn.size[1]}"
+            print(f"{version:>7} {box_size:>4} {pixels:>11} {old_ms:>12.2f} {new_ms:>11.2f} {old_ms / new_ms:>7.1f}x")
+    return 0
+
+
+# Benchmark: per-version encode latency, qrcode make() vs the vectorized mask path
+def bench_encode(args):
+    if not qr_engine.numpy_available:
+        print("NumPy is not installed - nothing to compare against")
+        return 1
+    from qr_masks import make_matrix
+
+    error_level = qr_engine.resolve_error_correction(args.ecc)
+    print(f"{'version':>7} {'modules':>8} {'qrcode (ms)':>12} {'vectorized (ms)':>16} {'speedup':>8}")
+    for version in range(args.first_version, args.last_version + 1):
+        # Fill about 90% of the version so Reed-Solomon work is realistic for its size
+        chars = int(max_chars(version, error_level, MODE_8BIT_BYTE) * 0.9)
+        payload = ("benchmark-" * (chars // 10 + 1))[:chars]
+        planned_version, segments, _ = plan_segments(payload, error_level, version)
+
+        def encode_qrcode():
+            qr = qrcode.QRCode(version=planned_version, error_correction=error_level)
+            for mode, chunk in segments:
+                qr.add_data(qr_engine.segment_data(mode, chunk))
+            qr.make(fit=False)
+            return qr
+
+        def encode_vectorized():
+            data_list = [qr_engine.segment_data(mode, chunk) for mode, chunk in segments]
+            return make_matrix(planned_version, error_level, data_list)
+
+        # Check both paths agree (this also warms the per-version layout cache)
+        modules, _ = encode_vectorized()
+        if [[bool(module) for module in row] for row in encode_qrcode().modules] != modules.astype(bool).tolist():
+            print(f"Matrices differ for version {planned_version}")
+            return 1
+
+        old_ms = best_time(encode_qrcode, args.repeat)
+        new_ms = best_time(encode_vectorized, args.repeat)
+        print(f"{planned_version:>7} {len(modules):>8} {old_ms:>12.2f} {new_ms:>16.2f} {old_ms / new_ms:>7.1f}x")
+    return 0
+
+
+# Queries the GUI runs against user_data.db, with a user id parameter
+db_queries = {
+    "history": "SELECT id, qr_type, content, created_at FROM qr_history WHERE user_id = ? ORDER BY created_at DESC",
+    "history page": "SELECT id, qr_type, substr(content, 1, 40), created_at FROM qr_history WHERE user_id = ? "
+                    "ORDER BY created_at DESC, id DESC LIMIT 100",
+    "analytics by type": "SELECT qr_type, COUNT(*) as count FROM analytics WHERE user_id = ? "
+                         "GROUP BY qr_type ORDER BY count DESC",
+    "analytics by date": "SELECT strftime('%Y-%m-%d', created_at) as date, COUNT(*) as count FROM analytics "
+                         "WHERE user_id = ? GROUP BY date ORDER BY date DESC LIMIT 7",
+    "favorites": "SELECT id, name FROM favorites WHERE user_id = ? ORDER BY name"
+}
+
+# Queries that read the analytics_daily rollup once the migrations have run
+db_rollup_queries = {
+    "analytics by type": "SELECT qr_type, SUM(count) as total FROM analytics_daily WHERE user_id = ? "
+                         "GROUP BY qr_type HAVING total > 0 ORDER BY total DESC",
+    "analytics by date": "SELECT day, SUM(count) as total FROM analytics_daily WHERE user_id = ? "
+                         "GROUP BY day HAVING total > 0 ORDER BY day DESC LIMIT 7"
+}
+
+
+# Function to fill a fresh database with synthetic users, history, analytics and favorites
+def fill_database(conn, rows, users):
+    random.seed(0)
+    types = qr_engine.qr_types
+    start = datetime(2024, 1, 1)
+
+    def timestamps():
+        for _ in range(rows):
+            yield (start + timedelta(seconds=random.randrange(60 * 60 * 24 * 365))).strftime("%Y-%m-%d %H:%M:%S")
+
+    with conn:
+        conn.executemany("INSERT INTO users (username, password) VALUES (?, ?)",
+                         ((f"user{i}", "secret") for i in range(users)))
+        conn.executemany("INSERT INTO qr_history (user_id, qr_type, content, created_at) VALUES (?, ?, ?, ?)",
+                         ((random.randint(1, users), random.choice(types), f"https://example.com/{i}", created)
+                          for i, created in enumerate(timestamps())))
+        conn.executemany("INSERT INTO analytics (user_id, qr_type, created_at) VALUES (?, ?, ?)",
+                         ((random.randint(1, users), random.choice(types), created) for created in timestamps()))
+        conn.executemany("INSERT INTO favorites (user_id, name, fg_color, bg_color, box_size, border_size, "
+                         "error_level) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                         ((random.randint(1, users), f"favorite {i}", "Black", "White", 10, 4, "M")
+                          for i in range(users * 5)))
+
+
+# Function to time every GUI query over a sample of users (total ms per query)
+def time_queries(conn, user_ids, repeat, overrides=None):
+    results = {}
+    for name, sql in db_queries.items():
+        sql = (overrides or {}).get(name, sql)
+        results[name] = best_time(lambda: [conn.execute(sql, (user_id,)).fetchall() for user_id in user_ids], repeat)
+    return results
+
+
+# Function to time single-row insert + commit latency (ms per insert), as the GUI used to do it
+def time_inserts(conn, count):
+    start_time = time.perf_counter()
+    for i in range(count):
+        conn.execute("INSERT INTO analytics (user_id, qr_type, created_at) VALUES (?, ?, ?)",
+                     (1, "url", "2025-01-01 00:00:00"))
+        conn.commit()
+    return (time.perf_counter() - start_time) * 1000 / count
+
+
+# Benchmark: user_data.db queries on a large database, original schema vs migrated + tuned
+def bench_db(args):
+    folder = tempfile.mkdtemp()
+    db_path = os.path.join(folder, "benchmark.db")
+    conn = sqlite3.connect(db_path)
+    try:
+        # The original schema with SQLite's default settings
+        qr_storage.migrate(conn, target=1)
+        fill_start = time.perf_counter()
+        fill_database(conn, args.rows, args.users)
+        print(f"Filled {args.rows} history and {args.rows} analytics rows for {args.users} users "
+              f"in {time.perf_counter() - fill_start:.1f}s")
+
+        user_ids = random.sample(range(1, args.users + 1), min(args.sample, args.users))
+        before = time_queries(conn, user_ids, args.repeat)
+        before["insert + commit"] = time_inserts(conn, args.inserts)
+
+        # Apply the tuned settings and the remaining migrations
+        migrate_start = time.perf_counter()
+        qr_storage.configure_connection(conn)
+        version = qr_storage.migrate(conn)
+        print(f"Migrated to schema version {version} in {time.perf_counter() - migrate_start:.1f}s")
+
+        after = time_queries(conn, user_ids, args.repeat, db_rollup_queries)
+        after["insert + commit"] = time_inserts(conn, args.inserts)
+    finally:
+        conn.close()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+        os.rmdir(folder)
+
+    print(f"\nTotal time for {len(user_ids)} users, best of {args.repeat} runs")
+    print(f"{'query':<18} {'before (ms)':>12} {'after (ms)':>11} {'speedup':>8}")
+    for name in before:
+        print(f"{name:<18} {before[name]:>12.2f} {after[name]:>11.2f} {before[name] / after[name]:>7.1f}x")
+    print("(insert + commit is per row)")
+    return 0
+
+
+benchmarks = {
+    "raster": bench_raster,
+    "encode": bench_encode,
+    "db": bench_db
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run QR code engine benchmarks.")
+    parser.add_argument("benchmark", choices=list(benchmarks.keys()))
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measurement (best is reported)")
+    parser.add_argument("--versions", type=int, nargs="+", default=[10, 20, 30, 40])
+    parser.add_argument("--box-sizes", type=int, nargs="+", default=[8, 10])
+    parser.add_argument("--ecc", default="M", help="error correction level for the encode benchmark")
+    parser.add_argument("--first-version", type=int, default=1)
+    parser.add_argument("--last-version", type=int, default=40)
+    parser.add_argument("--rows", type=int, default=1000000, help="history and analytics rows for the db benchmark")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--sample", type=int, default=50, help="users queried per db measurement")
+    parser.add_argument("--inserts", type=int, default=200, help="single-row commits timed by the db benchmark")
+    args = parser.parse_args(argv)
+    return benchmarks[args.benchmark](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+# Batch QR code generation from CSV or JSONL files.
+# Each row becomes one image, rendered on all cores with a process pool.
+#
+# Usage:
+#   python qr_batch.py tickets.csv -o out/ --template Professional
+#   python qr_batch.py assets.jsonl -o out/ --fg Navy --box-size 8 --ecc "H (30%)"
+#
+# A row needs a "type" column (text, url, event, contact or wifi; default text) and
+# the fields for that type, using the same names as qr_engine.build_payload:
+#   text: text                          url: url
+#   event: date, time, details, location
+#   contact: name, phone, email         wifi: ssid, password, security
+# Optional columns: filename, template, fg, bg, box_size, border, ecc.
+#
+# With --verify every code is decoded again after rendering (needs OpenCV); codes that do
+# not scan back to their data are reported as "unreadable" in batch_report.csv.
+# --format SVG or EPS writes vector files drawn straight from the module matrix (no logo).
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+from qr_engine import qr_types, qr_templates, build_payload, render_qr
+from qr_vector import vector_formats, save_vector
+
+try:
+    from qr_scanner import verify_image
+    verify_available = True
+except ImportError:
+    verify_available = False
+
+# Style keys a row (or the command line) can override
+style_keys = ("fg", "bg", "box_size", "border", "ecc")
+
+# File extensions for the supported output formats
+format_extensions = {
+    "PNG": ".png",
+    "JPEG": ".jpg",
+    "SVG": ".svg",
+    "EPS": ".eps"
+}
+
+# Settings shared by every job, set once per worker process by init_worker
+batch_settings = {}
+
+
+# Function to read rows from a CSV or JSONL file one at a time
+def read_rows(path):
+    if path.lower().endswith((".jsonl", ".ndjson")):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+    else:
+        with open(path, newline='', encoding="utf-8-sig") as f:
+            yield from csv.DictReader(f)
+
+
+# Function to work out the style for a row (command line style, then row template, then row columns)
+def row_style(row, base_style):
+    style = dict(base_style)
+    if row.get("template"):
+        style.update(qr_templates[row["template"]])
+    for key in style_keys:
+        if row.get(key) not in (None, ""):
+            style[key] = row[key]
+    return style
+
+
+# Function to pick the output file name for a row
+def row_file_name(index, row, qr_type):
+    extension = format_extensions[batch_settings["format"]]
+    name = row.get("filename")
+    if name:
+        # Never let a row write outside the output folder
+        name = os.path.basename(str(name))
+        if not os.path.splitext(name)[1]:
+            name += extension
+        return name
+    return f"{index:06d}_{qr_type}{extension}"
+
+
+# Function to set up the shared settings in each worker process
+def init_worker(settings):
+    batch_settings.update(settings)
+
+
+# Function to render one row and write its file (runs in a worker process)
+def render_job(job):
+    index, row = job
+    # CSV gives None for missing cells and JSONL may hold numbers, so make every field a string
+    row = {key: "" if value is None else str(value) for key, value in row.items() if key is not None}
+    qr_type = str(row.get("type") or row.get("qr_type") or "text").lower()
+    file_name = ""
+    try:
+        if qr_type not in qr_types:
+            raise ValueError(f"Unknown QR type: {qr_type}")
+        file_name = row_file_name(index, row, qr_type)
+        payload = build_payload(qr_type, row)
+        if not payload:
+            raise ValueError("Empty payload")
+
+        style = row_style(row, batch_settings["style"])
+        path = os.path.join(batch_settings["output_dir"], file_name)
+        if batch_settings["format"] in vector_formats:
+            save_vector(payload, path, batch_settings["format"], style)
+            img = None
+        else:
+            img = render_qr(payload, style, batch_settings["logo_path"])
+            img.save(path, format=batch_settings["format"])
+
+        if batch_settings.get("verify"):
+            # Vector files are checked through a raster of the same matrix
+            if img is None:
+                img = render_qr(payload, style)
+            ok, reason = verify_image(img, payload)
+            if not ok:
+                return index, qr_type, file_name, "unreadable", f"Does not scan: {reason}"
+        return index, qr_type, file_name, "ok", ""
+    except Exception as e:
+        return index, qr_type, file_name, "failed", str(e)
+
+
+# Function to run a batch and write a report; returns (generated, failed, seconds).
+# Codes that fail the verify check still get their file but count as failed.
+def run_batch(input_path, output_dir, style=None, logo_path=None, image_format="PNG",
+              workers=None, chunksize=16, progress=True, verify=False):
+    os.makedirs(output_dir, exist_ok=True)
+    settings = {
+        "style": dict(style or {}),
+        "logo_path": logo_path,
+        "format": image_format.upper(),
+        "output_dir": output_dir,
+        "verify": verify
+    }
+    init_worker(settings)
+
+    generated = 0
+    failed = 0
+    start_time = time.perf_counter()
+    last_report = start_time
+
+    report_path = os.path.join(output_dir, "batch_report.csv")
+    with open(report_path, 'w', newline='') as report_file, \
+            Pool(workers, initializer=init_worker, initargs=(settings,)) as pool:
+        report = csv.writer(report_file)
+        report.writerow(["row", "type", "file", "status", "error"])
+
+        jobs = enumerate(read_rows(input_path), start=1)
+        # Files are written by the workers as each job finishes; results arrive in completion order
+        for index, qr_type, file_name, status, error in pool.imap_unordered(render_job, jobs, chunksize):
+            if error:
+                failed += 1
+            else:
+                generated += 1
+            report.writerow([index, qr_type, file_name, status, error])
+
+            now = time.perf_counter()
+            if progress and now - last_report >= 1:
+                last_report = now
+                done = generated + failed
+                print(f"\r{done} rows - {done / (now - start_time):.0f} codes/s", end="", file=sys.stderr)
+
+    elapsed = time.perf_counter() - start_time
+    if progress:
+        print(file=sys.stderr)
+    return generated, failed, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate QR codes in bulk from a CSV or JSONL file.")
+    parser.add_argument("input", help="CSV or JSONL file with one QR code per row")
+    parser.add_argument("-o", "--output", default="qr_output", help="folder for the generated images")
+    parser.add_argument("--template", choices=list(qr_templates.keys()), help="start from a template style")
+    parser.add_argument("--fg", help="foreground color name or hex code")
+    parser.add_argument("--bg", help="background color name or hex code")
+    parser.add_argument("--box-size", help="pixels per module")
+    parser.add_argument("--border", help="quiet zone in modules")
+    parser.add_argument("--ecc", help='error correction level, e.g. "M (15%%)" or just M')
+    parser.add_argument("--logo", help="logo image to paste in the center of every code")
+    parser.add_argument("--format", default="PNG", choices=list(format_extensions.keys()))
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--chunksize", type=int, default=16, help="rows sent to a worker at a time")
+    parser.add_argument("--verify", action="store_true", help="decode every code again and report any that do not scan")
+    args = parser.parse_args(argv)
+
+    if args.verify and not verify_available:
+        print("--verify needs OpenCV and NumPy: pip install opencv-python numpy")
+        return 1
+    if args.logo and args.format in vector_formats:
+        print(f"--logo is only supported for raster formats, not {args.format}")
+        return 1
+
+    style = dict(qr_templates[args.template]) if args.template else {}
+    for key, value in (("fg", args.fg), ("bg", args.bg), ("box_size", args.box_size),
+                       ("border", args.border), ("ecc", args.ecc)):
+        if value:
+            style[key] = value
+
+    generated, failed, elapsed = run_batch(args.input, args.output, style, args.logo, args.format,
+                                           args.workers, args.chunksize, verify=args.verify)
+    rate = (generated + failed) / elapsed if elapsed else 0
+    print(f"Generated {generated} QR codes ({failed} failed) in {elapsed:.2f}s - {rate:.0f} codes/s")
+    print(f"Report written to {os.path.join(args.output, 'batch_report.csv')}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,267 @@
+# Exact QR code capacity and version calculator, and the segment planner used by the encoder.
+# All per-version limits are precomputed at import time. estimate_capacity only looks the
+# payload up in those tables, cheap enough for every keystroke. check_capacity plans the
+# optimal segments first (a pass over the payload per version class), which is exact:
+# because qr_engine encodes with the same plan, the version it reports is always the
+# version that gets rendered. The last few plans are cached, so checking a payload and
+# then rendering it plans it once.
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+
+from qrcode import util
+from qrcode.constants import ERROR_CORRECT_M
+
+# Encoding modes, as used by the qrcode library
+MODE_NUMBER = util.MODE_NUMBER
+MODE_ALPHA_NUM = util.MODE_ALPHA_NUM
+MODE_8BIT_BYTE = util.MODE_8BIT_BYTE
+MODE_KANJI = util.MODE_KANJI
+
+mode_names = {
+    MODE_NUMBER: "numeric",
+    MODE_ALPHA_NUM: "alphanumeric",
+    MODE_8BIT_BYTE: "byte",
+    MODE_KANJI: "kanji"
+}
+
+# Versions sharing the same character count field sizes
+version_classes = ((1, 9), (10, 26), (27, 40))
+
+# Segmentation costs are counted in sixths of a bit so numeric (10 bits per 3 digits)
+# and alphanumeric (11 bits per 2 chars) runs can be priced per character exactly
+segment_modes = (MODE_NUMBER, MODE_ALPHA_NUM, MODE_8BIT_BYTE, MODE_KANJI)
+alpha_num_chars = frozenset(util.ALPHA_NUM.decode("ascii"))
+
+# Data bits available per version, indexed [error level][version] (index 0 unused)
+data_bit_limits = util.BIT_LIMIT_TABLE
+
+# Recent segment plans: (text, error level, min version, kanji) -> (version, segments, bits)
+plan_cache = OrderedDict()
+plan_cache_limit = 8
+plan_cache_lock = threading.Lock()
+
+
+# Function to get the character count field size for a mode and version
+def count_bits(mode, version):
+    return util.mode_sizes_for_version(version)[mode]
+
+
+# Function to count the data bits of a segment of n characters (without mode/count header)
+def segment_data_bits(mode, n):
+    if mode == MODE_NUMBER:
+        return 10 * (n // 3) + (0, 4, 7)[n % 3]
+    if mode == MODE_ALPHA_NUM:
+        return 11 * (n // 2) + 6 * (n % 2)
+    if mode == MODE_KANJI:
+        return 13 * n
+    return 8 * n
+
+
+# Function to work out the most characters of one mode that fit in a version
+def max_chars_for(version, error_level, mode):
+    available = data_bit_limits[error_level][version] - 4 - count_bits(mode, version)
+    if mode == MODE_NUMBER:
+        chars = 3 * (available // 10)
+        remainder = available % 10
+        chars += 2 if remainder >= 7 else 1 if remainder >= 4 else 0
+    elif mode == MODE_ALPHA_NUM:
+        chars = 2 * (available // 11) + (1 if available % 11 >= 6 else 0)
+    elif mode == MODE_KANJI:
+        chars = available // 13
+    else:
+        chars = available // 8
+    # The count field also limits how long a single segment can be
+    return min(chars, (1 << count_bits(mode, version)) - 1)
+
+
+# Precomputed capacity tables: char_capacity[error level][mode][version] (index 0 unused)
+char_capacity = {
+    error_level: {
+        mode: [0] + [max_chars_for(version, error_level, mode) for version in range(1, 41)]
+        for mode in mode_names
+    }
+    for error_level in range(4)
+}
+
+
+# Function to look up how many characters of a mode fit in a version at an error level
+def max_chars(version, error_level, mode=MODE_8BIT_BYTE):
+    return char_capacity[error_level][mode][version]
+
+
+# Function to check whether a character can be encoded in Kanji mode (double-byte Shift JIS)
+def is_kanji(char):
+    try:
+        code = char.encode("shift_jis")
+    except UnicodeEncodeError:
+        return False
+    if len(code) != 2:
+        return False
+    value = (code[0] << 8) | code[1]
+    return 0x8140 <= value <= 0x9FFC or 0xE040 <= value <= 0xEBBF
+
+
+# Function to split text into the cheapest run of (mode, chunk) segments for a version class.
+# Dynamic programming over the characters: for each mode we keep the cheapest cost of
+# ending the text so far in that mode, and where switching modes pays off.
+def optimal_segments(text, version, kanji=True):
+    if not text:
+        return []
+
+    head_costs = [(4 + count_bits(mode, version)) * 6 for mode in segment_modes]
+    infinite = float("inf")
+    costs = head_costs[:]
+    # char_modes[i][j]: mode of character i on the cheapest path that is in mode j after it
+    char_modes = []
+
+    for char in text:
+        step = [None] * 4
+        new_costs = [infinite] * 4
+
+        new_costs[2] = costs[2] + len(char.encode("utf-8")) * 8 * 6
+        step[2] = MODE_8BIT_BYTE
+        if char in alpha_num_chars:
+            new_costs[1] = costs[1] + 33
+            step[1] = MODE_ALPHA_NUM
+        if "0" <= char <= "9":
+            new_costs[0] = costs[0] + 20
+            step[0] = MODE_NUMBER
+        if kanji and char > "\x7f" and is_kanji(char):
+            new_costs[3] = costs[3] + 78
+            step[3] = MODE_KANJI
+
+        # Consider ending the current segment here and starting a new one in another mode:
+        # the cheapest way to end a segment (rounded up to whole bits) plus the new header
+        best = min(range(4), key=lambda k: new_costs[k])
+        ended_cost = (new_costs[best] + 5) // 6 * 6
+        for j in range(4):
+            switch_cost = ended_cost + head_costs[j]
+            if switch_cost < new_costs[j]:
+                new_costs[j] = switch_cost
+                step[j] = segment_modes[best]
+
+        char_modes.append(step)
+        costs = new_costs
+
+    # Walk back from the cheapest final mode to recover the mode of every character
+    mode = segment_modes[min(range(4), key=lambda j: costs[j])]
+    modes = [None] * len(text)
+    for i in range(len(text) - 1, -1, -1):
+        mode = char_modes[i][segment_modes.index(mode)]
+        modes[i] = mode
+
+    # Merge runs of the same mode into segments
+    segments = []
+    start = 0
+    for i in range(1, len(text) + 1):
+        if i == len(text) or modes[i] != modes[start]:
+            segments.append((modes[start], text[start:i]))
+            start = i
+    return segments
+
+
+# Function to count the characters of a segment the way its count field does
+def segment_length(mode, chunk):
+    if mode == MODE_8BIT_BYTE:
+        return len(chunk.encode("utf-8"))
+    return len(chunk)
+
+
+# Function to count the total bits of a list of segments for a version
+def segments_bits(segments, version):
+    return sum(4 + count_bits(mode, version) + segment_data_bits(mode, segment_length(mode, chunk))
+               for mode, chunk in segments)
+
+
+# Function to plan the encoding of a payload: the smallest version (not below min_version)
+# and the optimal segments for it. Returns (version, segments, bits); version is None if
+# the payload does not fit in any QR code at this error level.
+def plan_segments(text, error_level, min_version=None, kanji=True):
+    key = (text, error_level, min_version, kanji)
+    with plan_cache_lock:
+        plan = plan_cache.get(key)
+        if plan is not None:
+            plan_cache.move_to_end(key)
+            return plan
+
+    plan = build_plan(text, error_level, min_version, kanji)
+    with plan_cache_lock:
+        plan_cache[key] = plan
+        if len(plan_cache) > plan_cache_limit:
+            plan_cache.popitem(last=False)
+    return plan
+
+
+# Function to work out a segment plan for plan_segments (uncached)
+def build_plan(text, error_level, min_version=None, kanji=True):
+    limits = data_bit_limits[error_level]
+    start = min_version or 1
+    segments = []
+    bits = 0
+    for first, last in version_classes:
+        # Every character costs at least 10/3 bits, so skip classes that are obviously too small
+        if last < start or len(text) * 10 > limits[last] * 3:
+            continue
+        # Segment headers depend on the version class, so the best split can change per class
+        segments = optimal_segments(text, first, kanji)
+        bits = segments_bits(segments, first)
+        version = bisect_left(limits, bits, max(first, start), last + 1)
+        if version <= last:
+            return version, segments, bits
+    return None, segments, bits
+
+
+# Function to check how a payload fits in a QR code at an error level
+def check_capacity(data, error_level=ERROR_CORRECT_M):
+    version, segments, needed_bits = plan_segments(data, error_level)
+    return capacity_report(data, error_level, version, segments, needed_bits)
+
+
+# Function to estimate how a payload fits from the capacity tables alone, encoding it in
+# the single cheapest mode every character allows (byte mode counts UTF-8 bytes). It never
+# reports a smaller version than check_capacity, but mixed-mode segmentation may fit the
+# payload in a smaller one.
+def estimate_capacity(data, error_level=ERROR_CORRECT_M):
+    if data.isascii() and data.isdigit():
+        mode, length = MODE_NUMBER, len(data)
+    elif alpha_num_chars.issuperset(data):
+        mode, length = MODE_ALPHA_NUM, len(data)
+    else:
+        mode, length = MODE_8BIT_BYTE, len(data.encode("utf-8"))
+
+    version = bisect_left(char_capacity[error_level][mode], length, 1)
+    if version > 40:
+        version = None
+    needed_bits = 4 + count_bits(mode, version or 40) + segment_data_bits(mode, length)
+    segments = [(mode, data)] if data else []
+    return capacity_report(data, error_level, version, segments, needed_bits)
+
+
+# Function to put the capacity figures of a planned payload into the dict the GUI shows
+def capacity_report(data, error_level, version, segments, needed_bits):
+    # Mode summary for display: a single mode, or "mixed" when segments differ
+    modes = {mode for mode, _ in segments}
+    if len(modes) == 1:
+        mode_name = mode_names[modes.pop()]
+    elif modes:
+        mode_name = "mixed"
+    else:
+        mode_name = "byte"
+
+    max_bits = data_bit_limits[error_level][40]
+    if version:
+        capacity_percent = needed_bits / data_bit_limits[error_level][version] * 100
+    else:
+        capacity_percent = 100.0
+
+    return {
+        "length": len(data),
+        "bytes": len(data.encode("utf-8")),
+        "mode": mode_name,
+        "version": version,
+        "bits": needed_bits,
+        "capacity_percent": capacity_percent,
+        "max_percent": min(100.0, needed_bits / max_bits * 100),
+        "fits": version is not None
+    }
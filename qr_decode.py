@@ -0,0 +1,153 @@
+# Bulk QR code decoding from video files, image folders or glob patterns.
+# Frames are decoded on all cores with a process pool; each payload is reported once,
+# however many frames or photos it appears in.
+#
+# Usage:
+#   python qr_decode.py photos/                             # every image in a folder
+#   python qr_decode.py "scans/**/*.jpg" --report codes.csv
+#   python qr_decode.py gate_camera.mp4 --every 2 --workers 4
+#
+# Also useful to load-test the scanner: frames/s and codes/s are printed at the end.
+import argparse
+import csv
+import sys
+import time
+from collections import deque
+from multiprocessing import Pool, cpu_count
+
+import cv2
+
+from qr_scanner import scan_settings, decoders, new_decode_state, decode_adaptive, image_files, open_frames
+
+# Decode state of the worker process (strategy stats and the last code outlines)
+worker_state = {}
+
+
+# Function to set up a worker process
+def init_worker(downscale, backends):
+    scan_settings["downscale"] = downscale
+    scan_settings["backends"] = backends
+    worker_state.update(new_decode_state())
+
+
+# Function to decode a chunk of jobs in a worker. A job is (name, image path or grayscale frame).
+# Returns [(name, [payloads], error)].
+def decode_jobs(jobs):
+    results = []
+    for name, item in jobs:
+        if isinstance(item, str):
+            item = cv2.imread(item, cv2.IMREAD_GRAYSCALE)
+            if item is None:
+                results.append((name, [], "could not read image"))
+                continue
+        try:
+            codes = decode_adaptive(item, worker_state)
+            results.append((name, [data for data, _ in codes], ""))
+        except Exception as e:
+            results.append((name, [], str(e)))
+    return results
+
+
+# Function to turn a source into decode jobs: image paths as they are, video frames in grayscale
+def source_jobs(source, every=1):
+    paths = image_files(source)
+    if paths:
+        for path in paths:
+            yield path, path
+        return
+    for index, (name, frame) in enumerate(open_frames(source)):
+        if index % every == 0:
+            yield name, cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+
+# Function to group jobs into lists of chunksize
+def chunked(jobs, chunksize):
+    chunk = []
+    for job in jobs:
+        chunk.append(job)
+        if len(chunk) == chunksize:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# Function to decode every frame of the sources. Calls on_payload(payload, name) the first time
+# each payload is seen. Returns (stats, payloads) where payloads maps each payload to
+# [first frame or file, times seen].
+def run_decode(sources, workers=None, chunksize=8, every=1, downscale=0.5, backends=None, on_payload=None):
+    workers = workers or cpu_count()
+    payloads = {}
+    stats = {"frames": 0, "codes": 0, "errors": 0}
+
+    def collect(results):
+        for name, found, error in results:
+            stats["frames"] += 1
+            stats["codes"] += len(found)
+            if error:
+                stats["errors"] += 1
+            for payload in found:
+                if payload in payloads:
+                    payloads[payload][1] += 1
+                else:
+                    payloads[payload] = [name, 1]
+                    if on_payload:
+                        on_payload(payload, name)
+
+    start_time = time.perf_counter()
+    with Pool(workers, initializer=init_worker, initargs=(downscale, backends)) as pool:
+        # Only a few chunks per worker are in flight, so a long video is never read into memory at once
+        pending = deque()
+        for source in sources:
+            for chunk in chunked(source_jobs(source, every), chunksize):
+                pending.append(pool.apply_async(decode_jobs, (chunk,)))
+                if len(pending) >= workers * 2:
+                    collect(pending.popleft().get())
+        while pending:
+            collect(pending.popleft().get())
+    stats["elapsed"] = time.perf_counter() - start_time
+    return stats, payloads
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Decode QR codes from video files, image folders or glob patterns.")
+    parser.add_argument("sources", nargs="+", help="video files, image folders or glob patterns (quote globs)")
+    parser.add_argument("--report", help="write the unique payloads to this CSV file")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--chunksize", type=int, default=8, help="frames sent to a worker at a time")
+    parser.add_argument("--every", type=int, default=1, help="only decode every Nth video frame")
+    parser.add_argument("--downscale", type=float, default=scan_settings["downscale"],
+                        help="scale of the first, cheap decode attempt (1 to disable)")
+    parser.add_argument("--backends", nargs="+", choices=list(decoders.keys()),
+                        help="decoder backends to use (default: all, fastest first)")
+    parser.add_argument("--quiet", action="store_true", help="only print the summary")
+    args = parser.parse_args(argv)
+
+    def print_payload(payload, name):
+        if not args.quiet:
+            print(f"{name}: {payload}")
+
+    try:
+        stats, payloads = run_decode(args.sources, args.workers, args.chunksize, max(1, args.every),
+                                     args.downscale, args.backends, print_payload)
+    except RuntimeError as e:
+        print(e)
+        return 1
+
+    if args.report:
+        with open(args.report, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["payload", "first_seen", "count"])
+            for payload, (name, count) in payloads.items():
+                writer.writerow([payload, name, count])
+
+    elapsed = stats["elapsed"]
+    frame_rate = stats["frames"] / elapsed if elapsed else 0
+    code_rate = stats["codes"] / elapsed if elapsed else 0
+    print(f"Decoded {stats['frames']} frames in {elapsed:.2f}s - {frame_rate:.1f} frames/s, {code_rate:.1f} codes/s")
+    print(f"{stats['codes']} codes found, {len(payloads)} unique payloads, {stats['errors']} unreadable frames")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,470 @@
+# Headless QR code rendering engine.
+# Everything needed to turn a payload and a style into an image lives here, so the
+# GUI, batch jobs and servers can share it. This module must not import tkinter,
+# ImageTk or the SQLite setup: it is loaded by worker processes in tight loops.
+import io
+import os
+import threading
+from collections import OrderedDict, namedtuple
+import qrcode
+from qrcode import util
+from qrcode.exceptions import DataOverflowError
+from qrcode.image.pil import PilImage
+from PIL import Image, ImageColor
+from qr_capacity import MODE_KANJI, plan_segments
+try:
+    import numpy as np
+    from qr_masks import make_matrix
+    numpy_available = True
+except ImportError:
+    numpy_available = False
+
+# Color dictionaries mapping names to hex codes
+foreground_colors = {
+    "Black": "#000000",
+    "Red": "#FF0000",
+    "Green": "#00AA00",
+    "Blue": "#0000FF",
+    "Purple": "#800080",
+    "Navy": "#000080",
+    "Teal": "#008080",
+    "Maroon": "#800000",
+    "Orange": "#FFA500",
+    "Brown": "#A52A2A",
+    "Magenta": "#FF00FF",
+    "Gold": "#FFD700",
+    "Crimson": "#DC143C",
+    "Forest Green": "#228B22",
+    "Royal Blue": "#4169E1"
+}
+
+background_colors = {
+    "White": "#FFFFFF",
+    "Light Gray": "#F0F0F0",
+    "Light Pink": "#FFE0E0",
+    "Light Green": "#E0FFE0",
+    "Light Blue": "#E0E0FF",
+    "Light Yellow": "#FFFFC0",
+    "Light Cyan": "#C0FFFF",
+    "Light Purple": "#FFE0FF",
+    "Beige": "#F5F5DC",
+    "Mint": "#F5FFFA",
+    "Lavender": "#E6E6FA",
+    "Ivory": "#FFFFF0",
+    "Cream": "#FFFDD0",
+    "Sky Blue": "#87CEEB",
+    "Peach": "#FFDAB9"
+}
+
+# QR code templates presets
+qr_templates = {
+    "Standard": {
+        "fg": "Black",
+        "bg": "White",
+        "box_size": "5",
+        "border": "2",
+        "ecc": "M (15%)",
+        "pattern": "Standard"
+    },
+    "Professional": {
+        "fg": "Navy",
+        "bg": "Light Gray",
+        "box_size": "6",
+        "border": "2",
+        "ecc": "H (30%)",
+        "pattern": "Standard"
+    },
+    "Colorful": {
+        "fg": "Purple",
+        "bg": "Light Yellow",
+        "box_size": "7",
+        "border": "3",
+        "ecc": "Q (25%)",
+        "pattern": "Dots"
+    },
+    "High Contrast": {
+        "fg": "Black",
+        "bg": "Light Yellow",
+        "box_size": "8",
+        "border": "4",
+        "ecc": "H (30%)",
+        "pattern": "Standard"
+    },
+    "Modern": {
+        "fg": "Royal Blue",
+        "bg": "White",
+        "box_size": "6",
+        "border": "2",
+        "ecc": "M (15%)",
+        "pattern": "Rounded"
+    },
+    "Corporate": {
+        "fg": "Teal",
+        "bg": "White",
+        "box_size": "5",
+        "border": "2",
+        "ecc": "M (15%)",
+        "pattern": "Standard"
+    }
+}
+
+# Error correction labels (as shown in the GUI) mapped to qrcode constants
+error_correction_levels = {
+    "L (7%)": qrcode.constants.ERROR_CORRECT_L,
+    "M (15%)": qrcode.constants.ERROR_CORRECT_M,
+    "Q (25%)": qrcode.constants.ERROR_CORRECT_Q,
+    "H (30%)": qrcode.constants.ERROR_CORRECT_H
+}
+
+# Payload types supported by build_payload (same as the GUI tabs)
+qr_types = ("text", "url", "event", "contact", "wifi")
+
+# Style used when the caller does not pass one (the Standard template)
+default_style = qr_templates["Standard"]
+
+
+# An encoded QR code: version, modules per side, and one byte (0 or 1) per module in row order
+QRMatrix = namedtuple("QRMatrix", ["version", "size", "modules"])
+
+# LRU cache of encoded matrices keyed by (payload, error level, version constraint).
+# It is bounded by an estimate of the memory it holds, not by entry count, because a
+# version 40 matrix is ~1500 times bigger than a version 1 one.
+matrix_cache = OrderedDict()
+matrix_cache_limit = 32 * 1024 * 1024  # bytes
+matrix_cache_stats = {"hits": 0, "misses": 0, "evictions": 0, "bytes": 0}
+matrix_cache_lock = threading.Lock()
+
+# Rough per-entry overhead of the key, tuple and dict slot on top of the module bytes
+matrix_entry_overhead = 200
+
+
+# Function to estimate how much memory a cache entry holds. A str payload is counted in UTF-8
+# bytes rather than characters, so non-ASCII (e.g. Kanji) payloads are not undercounted.
+def matrix_entry_size(payload, matrix):
+    payload_size = len(payload.encode("utf-8")) if isinstance(payload, str) else len(payload)
+    return len(matrix.modules) + payload_size + matrix_entry_overhead
+
+
+# Function to evict least recently used entries until the cache is under its limit
+# (call with matrix_cache_lock held)
+def trim_matrix_cache():
+    while matrix_cache and matrix_cache_stats["bytes"] > matrix_cache_limit:
+        old_key, old_matrix = matrix_cache.popitem(last=False)
+        matrix_cache_stats["bytes"] -= matrix_entry_size(old_key[0], old_matrix)
+        matrix_cache_stats["evictions"] += 1
+
+
+# Kanji mode segment for the qrcode library, which only ships numeric, alphanumeric and byte
+class KanjiData(util.QRData):
+    def __init__(self, text):
+        self.mode = MODE_KANJI
+        self.data = text.encode("shift_jis")
+
+    def __len__(self):
+        return len(self.data) // 2
+
+    def write(self, buffer):
+        for i in range(0, len(self.data), 2):
+            code = (self.data[i] << 8) | self.data[i + 1]
+            code -= 0x8140 if code <= 0x9FFC else 0xC140
+            buffer.put((code >> 8) * 0xC0 + (code & 0xFF), 13)
+
+
+# Function to turn a planned (mode, chunk) segment into qrcode data
+def segment_data(mode, chunk):
+    if mode == MODE_KANJI:
+        return KanjiData(chunk)
+    return util.QRData(chunk.encode("utf-8"), mode=mode, check_data=False)
+
+
+# Function to encode a payload into a module matrix (Reed-Solomon and mask selection).
+# The payload is split into optimal numeric/alphanumeric/byte/kanji segments first, so it
+# gets the smallest version possible at this error level.
+def build_matrix(payload, error_level, version=None):
+    planned_version, segments, bits = plan_segments(payload, error_level, version)
+    if planned_version is None:
+        raise DataOverflowError(f"Data too long for a QR code ({bits} bits)")
+
+    data_list = [segment_data(mode, chunk) for mode, chunk in segments]
+    if numpy_available:
+        # Same matrix as qrcode builds, with all 8 masks scored at once
+        modules, mask_pattern = make_matrix(planned_version, error_level, data_list)
+        return QRMatrix(planned_version, len(modules), modules.tobytes())
+
+    qr = qrcode.QRCode(version=planned_version, error_correction=error_level)
+    for data in data_list:
+        qr.add_data(data)
+    qr.make(fit=False)
+    modules = bytes(bool(module) for row in qr.modules for module in row)
+    return QRMatrix(qr.version, qr.modules_count, modules)
+
+
+# Function to get the encoded matrix for a payload, from the cache when possible.
+# version is the smallest version allowed (None means start at 1), like QRCode(version=...).
+def encode_matrix(payload, error_level, version=None):
+    key = (payload, error_level, version)
+    with matrix_cache_lock:
+        matrix = matrix_cache.get(key)
+        if matrix is not None:
+            matrix_cache.move_to_end(key)
+            matrix_cache_stats["hits"] += 1
+            return matrix
+        matrix_cache_stats["misses"] += 1
+
+    # Encode outside the lock so other threads are not held up
+    matrix = build_matrix(payload, error_level, version)
+    entry_size = matrix_entry_size(payload, matrix)
+
+    with matrix_cache_lock:
+        if entry_size <= matrix_cache_limit and key not in matrix_cache:
+            matrix_cache[key] = matrix
+            matrix_cache_stats["bytes"] += entry_size
+            trim_matrix_cache()
+    return matrix
+
+
+# Function to report matrix cache statistics (hits, misses, hit rate, size)
+def matrix_cache_info():
+    with matrix_cache_lock:
+        info = dict(matrix_cache_stats)
+        info["entries"] = len(matrix_cache)
+        info["limit"] = matrix_cache_limit
+    lookups = info["hits"] + info["misses"]
+    info["hit_rate"] = info["hits"] / lookups if lookups else 0.0
+    return info
+
+
+# Function to empty the matrix cache and reset its statistics
+def clear_matrix_cache():
+    with matrix_cache_lock:
+        matrix_cache.clear()
+        for key in matrix_cache_stats:
+            matrix_cache_stats[key] = 0
+
+
+# Function to change the matrix cache memory budget (in bytes)
+def set_matrix_cache_limit(limit):
+    global matrix_cache_limit
+    with matrix_cache_lock:
+        matrix_cache_limit = int(limit)
+        trim_matrix_cache()
+
+
+# Prepared logos keyed by (path, modification time, target size), most recently used last.
+# Each entry is (RGBA logo resampled to the target size, its alpha channel as a paste mask),
+# so repeated renders with one logo only pay for the paste.
+logo_cache = OrderedDict()
+logo_cache_limit = 16  # entries
+logo_cache_stats = {"hits": 0, "misses": 0}
+logo_cache_lock = threading.Lock()
+
+
+# Function to get a logo decoded, converted to RGBA and resized, from the cache when possible
+def prepare_logo(logo_path, size):
+    key = (logo_path, os.stat(logo_path).st_mtime_ns, size)
+    with logo_cache_lock:
+        prepared = logo_cache.get(key)
+        if prepared is not None:
+            logo_cache.move_to_end(key)
+            logo_cache_stats["hits"] += 1
+            return prepared
+        logo_cache_stats["misses"] += 1
+
+    with Image.open(logo_path) as logo:
+        logo = logo.convert("RGBA").resize((size, size), Image.LANCZOS)
+    prepared = (logo, logo.getchannel("A"))
+
+    with logo_cache_lock:
+        logo_cache[key] = prepared
+        while len(logo_cache) > logo_cache_limit:
+            logo_cache.popitem(last=False)
+    return prepared
+
+
+# Function to report logo cache statistics (hits, misses, entries)
+def logo_cache_info():
+    with logo_cache_lock:
+        info = dict(logo_cache_stats)
+        info["entries"] = len(logo_cache)
+    return info
+
+
+# Function to empty the logo cache and reset its statistics
+def clear_logo_cache():
+    with logo_cache_lock:
+        logo_cache.clear()
+        for key in logo_cache_stats:
+            logo_cache_stats[key] = 0
+
+
+# Function to turn a color name (or a hex code) into a hex code
+def resolve_color(color, palette):
+    return palette.get(color, color)
+
+
+# Function to convert an error correction label ("M (15%)" or just "M") to a qrcode constant
+def resolve_error_correction(ecc):
+    if ecc in error_correction_levels:
+        return error_correction_levels[ecc]
+    if isinstance(ecc, int) and ecc in error_correction_levels.values():
+        return ecc
+    for label, level in error_correction_levels.items():
+        if str(ecc).strip().upper() == label[0]:
+            return level
+    raise ValueError(f"Unknown error correction level: {ecc}")
+
+
+# Function to normalise a style dict (template keys, names or hex codes) into render settings
+def resolve_style(style=None):
+    if isinstance(style, str):
+        style = qr_templates[style]
+    merged = dict(default_style)
+    if style:
+        merged.update({key: value for key, value in style.items() if value not in (None, "")})
+
+    return {
+        "fg": resolve_color(merged["fg"], foreground_colors),
+        "bg": resolve_color(merged["bg"], background_colors),
+        "box_size": int(merged["box_size"]),
+        "border": int(merged["border"]),
+        "error_level": resolve_error_correction(merged["ecc"])
+    }
+
+
+# Function to build the QR payload string for a QR type from its form fields
+def build_payload(qr_type, fields):
+    if qr_type == 'text':
+        return fields.get("text", "")
+    elif qr_type == 'url':
+        url = fields.get("url", "")
+        # Prepend https:// if no protocol is specified
+        if url and not url.startswith(('http://', 'https://')):
+            url = 'https://' + url
+        return url
+    elif qr_type == 'event':
+        event_date = fields.get("date", "")
+        event_time = fields.get("time", "")
+        event_details = fields.get("details", "")
+        event_location = fields.get("location", "")
+        return f"BEGIN:VEVENT\nSUMMARY:{event_details}\nLOCATION:{event_location}\nDTSTART:{event_date.replace('-', '')}T{event_time.replace(':', '')}00\nEND:VEVENT"
+    elif qr_type == 'contact':
+        name = fields.get("name", "")
+        phone = fields.get("phone", "")
+        email = fields.get("email", "")
+        return f"BEGIN:VCARD\nVERSION:3.0\nN:{name}\nTEL:{phone}\nEMAIL:{email}\nEND:VCARD"
+    elif qr_type == 'wifi':
+        ssid = fields.get("ssid", "")
+        password = fields.get("password", "")
+        security = fields.get("security", "WPA")
+        return f"WIFI:S:{ssid};T:{security};P:{password};;"
+    raise ValueError(f"Unknown QR type: {qr_type}")
+
+
+# Function to paste a logo in the center of a QR code image (max 30% of its size)
+def add_logo(img, logo_path):
+    logo, mask = prepare_logo(logo_path, int(img.size[0] * 0.3))
+
+    # Black and white codes are 1-bit images; give the logo its colors
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGB")
+
+    # Calculate position (center)
+    pos = ((img.size[0] - logo.size[0]) // 2, (img.size[1] - logo.size[1]) // 2)
+
+    # Paste the logo onto the QR code, using its alpha channel as the mask
+    img.paste(logo, pos, mask)
+    return img
+
+
+# Function to draw an encoded matrix with the qrcode PIL backend
+def draw_matrix(matrix, settings):
+    size = matrix.size
+    image = PilImage(settings["border"], size, settings["box_size"], qrcode_modules=None,
+                     fill_color=settings["fg"], back_color=settings["bg"])
+    modules = matrix.modules
+    for r in range(size):
+        offset = r * size
+        for c in range(size):
+            if modules[offset + c]:
+                image.drawrect(r, c)
+    return image.get_image()
+
+
+# Function to pick the PIL image mode the qrcode PIL backend would use for these colors
+def image_mode(fg, bg):
+    if str(fg).lower() == "black" and str(bg).lower() == "white":
+        return "1"
+    if str(bg).lower() == "transparent":
+        return "RGBA"
+    return "RGB"
+
+
+# Function to rasterize an encoded matrix in one shot with NumPy.
+# Gives the same pixels as draw_matrix, without drawing module by module.
+def rasterize_matrix(matrix, settings):
+    size = matrix.size
+    box_size = settings["box_size"]
+    border = settings["border"]
+    mode = image_mode(settings["fg"], settings["bg"])
+
+    grid = np.frombuffer(matrix.modules, dtype=np.uint8).reshape(size, size)
+    if border:
+        grid = np.pad(grid, border)
+    side = grid.shape[0] * box_size
+
+    # Scale every module up to a box_size x box_size block of pixels
+    pixels = np.repeat(np.repeat(grid, box_size, axis=0), box_size, axis=1)
+
+    if mode == "1":
+        return Image.fromarray(pixels == 0)
+
+    # Use the module values as palette indices (0 = background, 1 = foreground) and let
+    # PIL expand the palette to real colors in one pass
+    img = Image.frombuffer("P", (side, side), pixels, "raw", "P", 0, 1)
+    if mode == "RGBA":
+        back = (0, 0, 0, 0)
+    else:
+        back = ImageColor.getcolor(settings["bg"], mode)
+    img.putpalette(back + ImageColor.getcolor(settings["fg"], mode), mode)
+    return img.convert(mode)
+
+
+# Function to get the largest box size (up to the style's own) that fits a matrix in max_size pixels
+def fitted_box_size(modules, settings, max_size):
+    return max(1, min(settings["box_size"], max_size // (modules + 2 * settings["border"])))
+
+
+# Function to get the width (= height) in pixels of the image render_qr makes
+def rendered_size(payload, style=None, max_size=None):
+    settings = resolve_style(style)
+    matrix = encode_matrix(payload, settings["error_level"])
+    box_size = fitted_box_size(matrix.size, settings, max_size) if max_size else settings["box_size"]
+    return (matrix.size + 2 * settings["border"]) * box_size
+
+
+# Function to render a payload to a PIL image.
+# max_size lowers the box size (down to 1 pixel per module) so the image fits in max_size
+# pixels; previews use it so that only exports are drawn at full resolution.
+def render_qr(payload, style=None, logo_path=None, max_size=None):
+    settings = resolve_style(style)
+
+    # Re-styling the same payload reuses the cached matrix and skips encoding
+    matrix = encode_matrix(payload, settings["error_level"])
+    if max_size:
+        settings["box_size"] = fitted_box_size(matrix.size, settings, max_size)
+    if numpy_available:
+        img = rasterize_matrix(matrix, settings)
+    else:
+        img = draw_matrix(matrix, settings)
+
+    if logo_path:
+        img = add_logo(img, logo_path)
+    return img
+
+
+# Function to render a payload straight to encoded image bytes (PNG by default)
+def render_qr_bytes(payload, style=None, logo_path=None, format="PNG"):
+    img = render_qr(payload, style, logo_path)
+    img_byte_array = io.BytesIO()
+    img.save(img_byte_array, format=format)
+    return img_byte_array.getvalue()
@@ -0,0 +1,57 @@
+# Command line export of user_data.db to CSV files, e.g. for a nightly job.
+#
+# Usage:
+#   python qr_export.py backups/                          # every table, in full
+#   python qr_export.py backups/ --incremental --gzip     # only rows added since the last incremental export
+#   python qr_export.py backups/ --incremental --tables qr_history analytics
+#
+# Incremental exports remember the highest id exported from each table in the database
+# (export_watermarks), so each run writes <table>_<first id>-<last id>.csv with the new rows only.
+import argparse
+import os
+import sys
+import time
+
+from qr_storage import open_database, export_tables, list_tables
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the QR code generator database to CSV files.")
+    parser.add_argument("output", help="folder for the CSV files")
+    parser.add_argument("--db", default="user_data.db", help="database file")
+    parser.add_argument("--tables", nargs="+", help="tables to export (default: all)")
+    parser.add_argument("--incremental", action="store_true", help="only export rows added since the last incremental export")
+    parser.add_argument("--gzip", action="store_true", help="write gzip-compressed .csv.gz files")
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows fetched from the database at a time")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        print(f"Database not found: {args.db}")
+        return 1
+    os.makedirs(args.output, exist_ok=True)
+
+    conn = open_database(args.db)
+    unknown = [table for table in args.tables or [] if table not in list_tables(conn)]
+    if unknown:
+        conn.close()
+        print(f"No such table: {', '.join(unknown)}")
+        return 1
+
+    start_time = time.perf_counter()
+    try:
+        exported = export_tables(conn, args.output, args.tables, args.incremental, args.gzip, args.batch_size)
+    finally:
+        conn.close()
+    elapsed = time.perf_counter() - start_time
+
+    for table, file_name, count in exported:
+        print(f"{table}: {count} rows -> {file_name}")
+    if not exported:
+        print("No new rows to export")
+    total = sum(count for _, _, count in exported)
+    print(f"Exported {total} rows in {elapsed:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+# Vectorized QR matrix construction and mask selection (needs NumPy).
+# qrcode's QRCode.make() lays out the whole matrix and scores it module by module once
+# for each of the 8 mask patterns, which dominates encode time for large versions.
+# Here the unmasked matrix is built once, all 8 masked candidates are made in a single
+# XOR, and the four penalty rules are computed for all of them with array operations.
+# The scoring matches qrcode's util.lost_point, so the chosen mask and the final matrix
+# are identical to what qrcode produces.
+import threading
+from collections import namedtuple
+
+import numpy as np
+from qrcode import util
+from qrcode.main import QRCode
+
+# Everything about a version's matrix that does not depend on the data
+MatrixLayout = namedtuple("MatrixLayout", ["size", "base", "data_rows", "data_cols", "masks"])
+
+# Layouts per version, and info overlays per (version, error level, mask); built on first use
+matrix_layouts = {}
+info_overlays = {}
+layout_lock = threading.Lock()
+
+# Finder-like patterns penalised by rule 3, read as 11-bit numbers (first module is the top bit)
+finder_patterns = (0b10111010000, 0b00001011101)
+
+
+# Function to compute the 8 mask patterns for a matrix size (True where a module is flipped)
+def mask_patterns(size):
+    i, j = np.indices((size, size))
+    return np.array([
+        (i + j) % 2 == 0,
+        i % 2 == 0,
+        j % 3 == 0,
+        (i + j) % 3 == 0,
+        (i // 2 + j // 3) % 2 == 0,
+        (i * j) % 2 + (i * j) % 3 == 0,
+        ((i * j) % 2 + (i * j) % 3) % 2 == 0,
+        ((i * j) % 3 + (i + j) % 2) % 2 == 0
+    ])
+
+
+# Function to lay out the function patterns of a version with qrcode's own code.
+# Returns the qrcode module grid: True/False for function modules, None for data modules.
+def function_modules(version, test=True, mask_pattern=0, error_level=0):
+    qr = QRCode(version=version, error_correction=error_level)
+    size = qr.modules_count = version * 4 + 17
+    qr.modules = [[None] * size for _ in range(size)]
+    qr.setup_position_probe_pattern(0, 0)
+    qr.setup_position_probe_pattern(size - 7, 0)
+    qr.setup_position_probe_pattern(0, size - 7)
+    qr.setup_position_adjust_pattern()
+    qr.setup_timing_pattern()
+    qr.setup_type_info(test, mask_pattern)
+    if version >= 7:
+        qr.setup_type_number(test)
+    return qr.modules
+
+
+# Function to list data module coordinates in placement order (the two-column zigzag)
+def data_positions(modules):
+    size = len(modules)
+    rows = []
+    cols = []
+    inc = -1
+    row = size - 1
+    for col in range(size - 1, 0, -2):
+        if col <= 6:
+            col -= 1
+        while 0 <= row < size:
+            for c in (col, col - 1):
+                if modules[row][c] is None:
+                    rows.append(row)
+                    cols.append(c)
+            row += inc
+        row -= inc
+        inc = -inc
+    return np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)
+
+
+# Function to get (and cache) the data-independent layout of a version
+def matrix_layout(version):
+    layout = matrix_layouts.get(version)
+    if layout is not None:
+        return layout
+
+    # Function modules as they are while masks are scored (format and version info light)
+    modules = function_modules(version)
+    size = len(modules)
+    base = np.array([[bool(module) for module in row] for row in modules], dtype=np.uint8)
+    data_rows, data_cols = data_positions(modules)
+
+    # Masks only ever flip data modules
+    is_data = np.zeros((size, size), dtype=bool)
+    is_data[data_rows, data_cols] = True
+    masks = (mask_patterns(size) & is_data).astype(np.uint8)
+
+    layout = MatrixLayout(size, base, data_rows, data_cols, masks)
+    with layout_lock:
+        matrix_layouts[version] = layout
+    return layout
+
+
+# Function to get (and cache) the real format/version info modules for a mask: (rows, cols, values)
+def info_overlay(version, error_level, mask_pattern):
+    key = (version, error_level, mask_pattern)
+    overlay = info_overlays.get(key)
+    if overlay is not None:
+        return overlay
+
+    final = function_modules(version, test=False, mask_pattern=mask_pattern, error_level=error_level)
+    scored = function_modules(version)
+    rows, cols, values = [], [], []
+    for r, (final_row, scored_row) in enumerate(zip(final, scored)):
+        for c, (final_module, scored_module) in enumerate(zip(final_row, scored_row)):
+            if final_module != scored_module:
+                rows.append(r)
+                cols.append(c)
+                values.append(bool(final_module))
+
+    overlay = (np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp), np.array(values, dtype=np.uint8))
+    with layout_lock:
+        info_overlays[key] = overlay
+    return overlay
+
+
+# Rule 1: runs of 5 or more same-colored modules in a row, scoring (length - 2) each
+def run_penalties(lines, candidates):
+    count, size = lines.shape
+    starts_run = np.ones((count, size), dtype=bool)
+    starts_run[:, 1:] = lines[:, 1:] != lines[:, :-1]
+    starts = np.flatnonzero(starts_run)
+    lengths = np.diff(np.append(starts, count * size))
+    long_runs = lengths >= 5
+    owner = starts[long_runs] // (size * size)
+    return np.bincount(owner, weights=lengths[long_runs] - 2, minlength=candidates).astype(np.int64)
+
+
+# Rule 3: finder-like 1:1:3:1:1 patterns with 4 light modules on one side, 40 each
+def finder_penalties(grids):
+    size = grids.shape[-1]
+    windows = np.zeros(grids.shape[:-1] + (size - 10,), dtype=np.int16)
+    for k in range(11):
+        windows = (windows << 1) | grids[..., k:size - 10 + k]
+    matches = (windows == finder_patterns[0]) | (windows == finder_patterns[1])
+    return matches.sum(axis=(1, 2)) * 40
+
+
+# Function to score masked candidates (shape (masks, n, n)) with the four QR penalty rules
+def mask_penalties(candidates):
+    count, size, _ = candidates.shape
+    columns = np.ascontiguousarray(candidates.transpose(0, 2, 1))
+
+    # Rule 1: rows and columns
+    penalty = run_penalties(candidates.reshape(count * size, size), count)
+    penalty += run_penalties(columns.reshape(count * size, size), count)
+
+    # Rule 2: 2x2 blocks of one color, 3 each (overlapping blocks all count)
+    top_left = candidates[:, :-1, :-1]
+    blocks = ((top_left == candidates[:, 1:, :-1]) & (top_left == candidates[:, :-1, 1:])
+              & (top_left == candidates[:, 1:, 1:]))
+    penalty += blocks.sum(axis=(1, 2)) * 3
+
+    # Rule 3: rows and columns
+    penalty += finder_penalties(candidates)
+    penalty += finder_penalties(columns)
+
+    # Rule 4: every 5% the dark ratio strays from 50% costs 10
+    percent = candidates.sum(axis=(1, 2)) / float(size * size)
+    penalty += (np.abs(percent * 100 - 50) / 5).astype(np.int64) * 10
+    return penalty
+
+
+# Function to build the final module matrix for encoded data, choosing the best mask.
+# data_list is a list of qrcode QRData segments. Returns (modules as an n x n uint8 array, mask).
+def make_matrix(version, error_level, data_list):
+    layout = matrix_layout(version)
+
+    # Reed-Solomon encoding is still done by qrcode
+    codewords = util.create_data(version, error_level, data_list)
+    bits = np.unpackbits(np.array(codewords, dtype=np.uint8))
+    # Remainder modules after the last codeword stay light (before masking)
+    placed = np.zeros(len(layout.data_rows), dtype=np.uint8)
+    placed[:min(len(bits), len(placed))] = bits[:len(placed)]
+
+    grid = layout.base.copy()
+    grid[layout.data_rows, layout.data_cols] = placed
+
+    # All 8 masked candidates at once, scored together
+    candidates = grid[None, :, :] ^ layout.masks
+    mask_pattern = int(np.argmin(mask_penalties(candidates)))
+
+    matrix = candidates[mask_pattern]
+    rows, cols, values = info_overlay(version, error_level, mask_pattern)
+    matrix[rows, cols] = values
+    return matrix, mask_pattern
@@ -0,0 +1,518 @@
+# Live QR code scanning with the camera work kept off the Tk thread (needs OpenCV and NumPy;
+# pyzbar is used as well when it is installed).
+#
+# A capture thread reads frames and a decode worker decodes them. They are linked by
+# single-slot mailboxes: a newer frame replaces one that has not been picked up yet
+# ("latest frame wins"), so when decoding is slower than the camera frames are skipped
+# instead of piling up, and the preview never falls behind. The capture thread also converts
+# each frame for display and outlines the codes found most recently, so the GUI only has to
+# show the newest display frame and the newest results.
+#
+# Each frame is decoded with the cheapest strategy that finds something: a downscaled
+# grayscale copy first, then the full-resolution region around the codes found last time,
+# and the whole full-resolution frame only when both miss. Hit rates and latency per
+# strategy are reported by scanner_info() for tuning on slow machines.
+#
+# Decoding goes through pluggable backends (pyzbar and OpenCV's QRCodeDetector built in,
+# more via register_decoder). Each stream measures every backend's latency and hit rate and
+# tries the one with the lowest cost per successful decode first; the others are only tried
+# on the final full-frame attempt, when the preferred one has missed.
+#
+# Display frames are produced at most display_fps times a second, and not at all while the
+# picture and the outlines stay the same. They are converted into a small pool of reused
+# buffers: the GUI pastes a frame into its one PhotoImage and hands the buffer back.
+#
+#   scanner = start_scanner(0)
+#   image = scanner["display"].take(0)        # newest RGB frame, or None if nothing new
+#   ...paste image into the preview...
+#   release_display_frame(scanner, image)     # let the capture thread reuse the buffer
+#   version, codes = latest_codes(scanner)    # [(data, polygon)] from the newest decoded frame
+#   stop_scanner(scanner)
+#
+# A source is a camera index, a video file, a folder of images or a glob pattern such as
+# "photos/**/*.jpg" (see open_frames); qr_decode.py decodes whole files and folders in bulk.
+#
+# verify_image() decodes a generated QR code image to check it still scans (e.g. with a logo
+# on top); verify_in_background() does it on a worker thread.
+import glob
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+from PIL import Image
+
+try:
+    from pyzbar.pyzbar import decode
+    pyzbar_available = True
+except ImportError:
+    pyzbar_available = False
+
+
+# Single-slot mailbox between two threads; put() replaces an item nobody has taken yet
+class FrameSlot:
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.item = None
+        self.dropped = 0  # items replaced before they were taken
+
+    # Store an item; returns the item it replaced (None if the slot was empty)
+    def put(self, item):
+        with self.condition:
+            replaced = self.item
+            if replaced is not None:
+                self.dropped += 1
+            self.item = item
+            self.condition.notify()
+            return replaced
+
+    # Wait up to timeout seconds (0 = don't wait, None = forever) for an item; None if there is none
+    def take(self, timeout=None):
+        with self.condition:
+            if self.item is None and timeout != 0:
+                self.condition.wait(timeout)
+            item = self.item
+            self.item = None
+            return item
+
+
+# Decode strategies, cheapest first
+decode_strategies = ("downscaled", "region", "full")
+
+scan_settings = {
+    "downscale": 0.5,         # scale of the first, cheap decode attempt
+    "region_margin": 0.25,    # extra space around the last codes, as a fraction of their size
+    "display_fps": 30,        # most display frames prepared per second
+    "decode_fps": None,       # most frames decoded per second (None = as many as possible)
+    "still_threshold": 1.0,   # mean pixel change below which a frame counts as unchanged
+    "backends": None,         # decoder backends to use, e.g. ["opencv"] (None = all registered)
+    "explore_interval": 50    # every this many decodes another backend gets to go first
+}
+
+# Size of the thumbnails compared to spot unchanged frames
+thumbnail_size = (32, 24)
+
+# File types read from image folders and glob patterns
+image_extensions = (".png", ".jpg", ".jpeg", ".bmp", ".gif", ".tif", ".tiff", ".webp")
+
+
+# Function to list the image files named by a folder or a glob pattern ([] for other sources)
+def image_files(source):
+    if isinstance(source, int):
+        return []
+    if os.path.isdir(source):
+        paths = [os.path.join(source, name) for name in os.listdir(source)]
+    elif any(char in source for char in "*?["):
+        paths = glob.glob(source, recursive=True)
+    else:
+        return []
+    return sorted(path for path in paths if path.lower().endswith(image_extensions))
+
+
+# Function to open a frame source: a camera index, a video file, an image folder or a glob.
+# Returns an iterator of (name, BGR frame); raises RuntimeError if the source cannot be opened.
+def open_frames(source):
+    if not isinstance(source, int) and (os.path.isdir(source) or any(char in source for char in "*?[")):
+        paths = image_files(source)
+        if not paths:
+            raise RuntimeError(f"No images found in {source!r}")
+        return read_images(paths)
+
+    capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        capture.release()
+        raise RuntimeError(f"Could not open video source {source!r}")
+    return read_video(capture, source)
+
+
+# Function to read image files one at a time (unreadable files are skipped)
+def read_images(paths):
+    for path in paths:
+        frame = cv2.imread(path)
+        if frame is not None:
+            yield path, frame
+
+
+# Function to read the frames of an open camera or video file, releasing it when done
+def read_video(capture, source):
+    index = 0
+    misses = 0
+    try:
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                # A camera can miss a frame now and then (but not for a whole second);
+                # a video file has simply ended
+                misses += 1
+                if isinstance(source, int) and misses < 100:
+                    time.sleep(0.01)
+                    continue
+                return
+            misses = 0
+            yield f"{source}#{index}", frame
+            index += 1
+    finally:
+        capture.release()
+
+
+# Decoder backends: name -> function(grayscale image) -> [(data, polygon as [(x, y)])]
+decoders = {}
+
+# Time charged for a miss when ranking backends (see backend_order)
+miss_penalty_ms = 50.0
+
+# OpenCV detectors, one per thread
+opencv_detectors = threading.local()
+
+
+# Function to add a decoder backend (or replace one with the same name)
+def register_decoder(name, function):
+    decoders[name] = function
+
+
+# Decoder backend: pyzbar (zbar)
+def decode_pyzbar(image):
+    return [(obj.data.decode("utf-8", errors="replace"), [(point.x, point.y) for point in obj.polygon])
+            for obj in decode(image)]
+
+
+# Decoder backend: OpenCV's QRCodeDetector, which can find several codes per frame
+def decode_opencv(image):
+    detector = getattr(opencv_detectors, "detector", None)
+    if detector is None:
+        detector = opencv_detectors.detector = cv2.QRCodeDetector()
+    found, texts, points, _ = detector.detectAndDecodeMulti(image)
+    if not found:
+        return []
+    # Codes that were located but could not be read come back as empty strings
+    return [(text, [(int(x), int(y)) for x, y in quad]) for text, quad in zip(texts, points) if text]
+
+
+if pyzbar_available:
+    register_decoder("pyzbar", decode_pyzbar)
+register_decoder("opencv", decode_opencv)
+
+
+# Function to create the per-stream state of decode_adaptive: last code outlines, strategy and backend stats
+def new_decode_state():
+    return {
+        "last_polygons": [],
+        "strategies": {name: {"attempts": 0, "hits": 0, "total_ms": 0.0} for name in decode_strategies},
+        "backends": {},
+        "decodes": 0
+    }
+
+
+# Function to order the backends for the next decode: the lowest cost per hit first.
+# The cost is the time spent per code found, counting an extra miss_penalty_ms once plus once
+# per error, so a backend that never finds anything (or keeps failing) is not preferred just
+# because it gives up quickly. Backends not measured yet go first, and every explore_interval
+# decodes the runner-up leads instead so its figures stay current.
+def backend_order(state):
+    names = [name for name in (scan_settings["backends"] or decoders) if name in decoders]
+
+    def cost(name):
+        stats = state["backends"].get(name)
+        if not stats or not stats["attempts"]:
+            return 0.0
+        return (stats["total_ms"] + miss_penalty_ms * (1 + stats["errors"])) / (stats["hits"] + 1)
+
+    names.sort(key=cost)
+    state["decodes"] += 1
+    if len(names) > 1 and state["decodes"] % scan_settings["explore_interval"] == 0:
+        names[0], names[1] = names[1], names[0]
+    return names
+
+
+# Function to decode an image with the preferred backend, or with every backend in turn when
+# fallback is set, recording each backend's attempts, hits, errors and latency
+def decode_frame(image, state, fallback=False):
+    for name in backend_order(state)[:None if fallback else 1]:
+        stats = state["backends"].setdefault(name, {"attempts": 0, "hits": 0, "errors": 0, "total_ms": 0.0})
+        start_time = time.perf_counter()
+        try:
+            codes = decoders[name](image)
+        except Exception:
+            # A backend that fails on a frame counts as a miss; the next one gets a go
+            stats["errors"] += 1
+            codes = []
+        stats["total_ms"] += (time.perf_counter() - start_time) * 1000
+        stats["attempts"] += 1
+        if codes:
+            stats["hits"] += 1
+            return codes
+    return []
+
+
+# Function to get the bounding box (x0, y0, x1, y1) around polygons, grown by a margin and clipped to the frame
+def region_around(polygons, width, height, margin):
+    points = np.array([point for polygon in polygons for point in polygon])
+    x0, y0 = points.min(axis=0)
+    x1, y1 = points.max(axis=0)
+    pad_x = int((x1 - x0) * margin) + 1
+    pad_y = int((y1 - y0) * margin) + 1
+    return (int(max(0, x0 - pad_x)), int(max(0, y0 - pad_y)),
+            int(min(width, x1 + pad_x + 1)), int(min(height, y1 + pad_y + 1)))
+
+
+# Function to run one strategy, recording its attempt, hit and latency
+def try_strategy(state, name, image, fallback=False):
+    stats = state["strategies"][name]
+    start_time = time.perf_counter()
+    codes = decode_frame(image, state, fallback)
+    stats["total_ms"] += (time.perf_counter() - start_time) * 1000
+    stats["attempts"] += 1
+    if codes:
+        stats["hits"] += 1
+    return codes
+
+
+# Function to decode a frame with the cheapest strategy that finds a code (see the top of the file)
+def decode_adaptive(frame, state):
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    height, width = gray.shape
+    scale = scan_settings["downscale"]
+
+    codes = []
+    if scale < 1:
+        small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        codes = [(data, [(int(x / scale), int(y / scale)) for x, y in polygon])
+                 for data, polygon in try_strategy(state, "downscaled", small)]
+
+    if not codes and state["last_polygons"]:
+        x0, y0, x1, y1 = region_around(state["last_polygons"], width, height, scan_settings["region_margin"])
+        codes = [(data, [(x + x0, y + y0) for x, y in polygon])
+                 for data, polygon in try_strategy(state, "region", gray[y0:y1, x0:x1])]
+
+    if not codes:
+        codes = try_strategy(state, "full", gray, fallback=True)
+
+    # Nothing anywhere in the frame means the codes have gone, so stop looking where they were
+    state["last_polygons"] = [polygon for _, polygon in codes]
+    return codes
+
+
+# Function to outline decoded codes on an image (in place)
+def draw_codes(image, codes, color=(0, 255, 0)):
+    for _, polygon in codes:
+        points = np.array(polygon, dtype=np.int32)
+        if len(points) > 4:
+            points = cv2.convexHull(points)
+        cv2.polylines(image, [points.reshape((-1, 1, 2))], True, color, 2)
+
+
+# Function to open a frame source (see open_frames) and start the capture and decode threads.
+# Raises RuntimeError if the source cannot be opened.
+def start_scanner(source=0):
+    scanner = {
+        "source": source,
+        "reader": open_frames(source),
+        "frames": FrameSlot(),             # newest camera frame waiting to be decoded
+        "display": FrameSlot(),            # newest annotated RGB frame waiting to be shown
+        "spare_buffers": queue.SimpleQueue(),  # display buffers handed back for reuse
+        "codes": [],                       # codes in the most recently decoded frame
+        "codes_version": 0,                # bumped whenever the decoded data changes
+        "decode_state": new_decode_state(),
+        "stop": threading.Event(),
+        "capture_done": threading.Event(),
+        "lock": threading.Lock(),
+        "stats": {
+            "started": time.monotonic(),
+            "captured": 0,
+            "displayed": 0,
+            "unchanged": 0,
+            "decoded": 0,
+            "last_decode_ms": 0.0,
+            "total_decode_ms": 0.0
+        },
+        "threads": []
+    }
+    for name, target in (("scanner-capture", capture_loop), ("scanner-decode", decode_loop)):
+        thread = threading.Thread(target=target, args=(scanner,), name=name, daemon=True)
+        thread.start()
+        scanner["threads"].append(thread)
+    return scanner
+
+
+# Function to stop the scanner threads and release the frame source
+def stop_scanner(scanner, timeout=2.0):
+    scanner["stop"].set()
+    for thread in scanner["threads"]:
+        thread.join(timeout)
+
+
+# Function to get the newest decode results as (version, [(data, polygon)]);
+# version changes whenever the decoded data does (not when a code just moves)
+def latest_codes(scanner):
+    with scanner["lock"]:
+        return scanner["codes_version"], scanner["codes"]
+
+
+# Function to report frame rates, skipped frames and decode latency
+def scanner_info(scanner):
+    with scanner["lock"]:
+        info = dict(scanner["stats"])
+    elapsed = max(time.monotonic() - info.pop("started"), 1e-9)
+    info["capture_fps"] = info["captured"] / elapsed
+    info["decode_fps"] = info["decoded"] / elapsed
+    info["display_fps"] = info["displayed"] / elapsed
+    info["skipped"] = scanner["frames"].dropped
+    info["avg_decode_ms"] = info["total_decode_ms"] / info["decoded"] if info["decoded"] else 0.0
+    info["strategies"] = strategy_info(scanner["decode_state"])
+    info["backends"] = backend_info(scanner["decode_state"])
+    return info
+
+
+# Function to summarize decode strategies: attempts, hits, hit rate and average latency of each
+def strategy_info(state):
+    return summarize_counters(state["strategies"])
+
+
+# Function to summarize decoder backends: attempts, hits, errors, hit rate and average latency of each
+def backend_info(state):
+    return summarize_counters(state["backends"])
+
+
+# Function to add hit rates and average latency to {name: {"attempts", "hits", "total_ms", ...}}
+def summarize_counters(counters):
+    summary = {}
+    # The decode worker may add entries meanwhile, so iterate over a snapshot
+    for name, stats in list(counters.items()):
+        stats = dict(stats)
+        attempts = stats["attempts"]
+        total_ms = stats.pop("total_ms")
+        stats["hit_rate"] = stats["hits"] / attempts if attempts else 0.0
+        stats["avg_ms"] = total_ms / attempts if attempts else 0.0
+        summary[name] = stats
+    return summary
+
+
+# Function to hand a display frame back once it has been shown, so its buffer can be reused
+def release_display_frame(scanner, image):
+    scanner["spare_buffers"].put(image)
+
+
+# Function to get a buffer for a display frame: a returned one if it fits, otherwise a new one
+def display_buffer(scanner, shape):
+    while True:
+        try:
+            buffer = scanner["spare_buffers"].get_nowait()
+        except queue.Empty:
+            return np.empty(shape, dtype=np.uint8)
+        if buffer.shape == shape:
+            return buffer
+
+
+# Capture thread: read frames, hand them to the decoder and prepare them for display
+def capture_loop(scanner):
+    reader = scanner["reader"]
+    stats = scanner["stats"]
+    next_display = 0.0
+    last_thumbnail = None
+    last_codes = None
+    try:
+        for _, frame in reader:
+            if scanner["stop"].is_set():
+                break
+            scanner["frames"].put(frame)
+
+            with scanner["lock"]:
+                stats["captured"] += 1
+                codes = scanner["codes"]
+
+            # Display frames are capped at display_fps
+            now = time.monotonic()
+            if now < next_display:
+                continue
+            next_display = now + 1.0 / scan_settings["display_fps"]
+
+            # Skip frames that look the same as the last one shown, with the same outlines
+            thumbnail = cv2.resize(frame, thumbnail_size, interpolation=cv2.INTER_AREA)
+            if (last_thumbnail is not None and codes == last_codes
+                    and cv2.norm(thumbnail, last_thumbnail, cv2.NORM_L1) / thumbnail.size
+                    < scan_settings["still_threshold"]):
+                with scanner["lock"]:
+                    stats["unchanged"] += 1
+                continue
+            last_thumbnail = thumbnail
+            last_codes = codes
+
+            # The decoder may still be reading frame, so annotate the converted copy
+            image = display_buffer(scanner, frame.shape)
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=image)
+            draw_codes(image, codes)
+            replaced = scanner["display"].put(image)
+            if replaced is not None:
+                release_display_frame(scanner, replaced)
+            with scanner["lock"]:
+                stats["displayed"] += 1
+    finally:
+        reader.close()
+        scanner["capture_done"].set()
+
+
+# Decode worker: always decode the newest frame, skipping any that arrived in the meantime
+def decode_loop(scanner):
+    stats = scanner["stats"]
+    while not scanner["stop"].is_set():
+        frame = scanner["frames"].take(timeout=0.1)
+        if frame is None:
+            if scanner["capture_done"].is_set():
+                break
+            continue
+
+        start_time = time.perf_counter()
+        codes = decode_adaptive(frame, scanner["decode_state"])
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+
+        with scanner["lock"]:
+            stats["decoded"] += 1
+            stats["last_decode_ms"] = elapsed_ms
+            stats["total_decode_ms"] += elapsed_ms
+            if [data for data, _ in codes] != [data for data, _ in scanner["codes"]]:
+                scanner["codes_version"] += 1
+            scanner["codes"] = codes
+
+        # Decoding is capped at decode_fps; frames arriving meanwhile are skipped by the slot
+        if scan_settings["decode_fps"]:
+            scanner["stop"].wait(max(0.0, 1.0 / scan_settings["decode_fps"] - elapsed_ms / 1000))
+
+
+# Worker thread for verify_in_background, started on first use
+verify_executor = None
+
+
+# Function to check that a generated QR code image decodes back to its payload with any
+# decoder backend. Every backend gets a go before the image is reported as reading wrong, as
+# one backend may read the right code with the wrong charset. Returns (ok, reason) where
+# reason explains a failure.
+def verify_image(image, expected):
+    # Transparent backgrounds are checked as if printed on white
+    if image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info:
+        background = Image.new("RGBA", image.size, "white")
+        image = Image.alpha_composite(background, image.convert("RGBA"))
+    gray = np.asarray(image.convert("L"))
+
+    found = []
+    for name in list(decoders):
+        try:
+            found.extend(data for data, _ in decoders[name](gray))
+        except Exception:
+            # A backend that fails here just doesn't count; the others may still read it
+            continue
+        if expected in found:
+            return True, ""
+    if found:
+        return False, "it scans as different data"
+    return False, "no QR code could be read from it"
+
+
+# Function to run verify_image on a background thread; returns a Future of (ok, reason)
+def verify_in_background(image, expected):
+    global verify_executor
+    if verify_executor is None:
+        verify_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="qr-verify")
+    return verify_executor.submit(verify_image, image, expected)
@@ -0,0 +1,508 @@
+# Database helpers shared by the GUI and the command line tools.
+#
+# Schema: open_database() tunes the connection (WAL journal, cache and mmap sizes) and
+# applies any schema migrations the database has not seen yet. PRAGMA user_version
+# records how many migrations have been applied.
+#
+# Background writer: analytics and history inserts are queued and written by one
+# thread on its own connection, many rows per transaction, so generating a QR code
+# never waits for a commit (fsync) on the UI thread.
+import atexit
+import csv
+import gzip
+import itertools
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+# Connection settings applied to every connection. WAL lets readers and the background
+# writer work at the same time, and with WAL synchronous=NORMAL only syncs at checkpoints.
+connection_pragmas = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -32000",      # 32 MB page cache
+    "PRAGMA mmap_size = 268435456",    # memory-map up to 256 MB of the file
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000"
+)
+
+
+# Migration 1: the original tables
+def migration_initial_schema(conn):
+    conn.execute('''CREATE TABLE IF NOT EXISTS users (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    username TEXT UNIQUE,
+                    password TEXT)''')
+
+    # Databases created before admin support have no is_admin column
+    columns = [column[1] for column in conn.execute("PRAGMA table_info(users)")]
+    if "is_admin" not in columns:
+        conn.execute("ALTER TABLE users ADD COLUMN is_admin INTEGER DEFAULT 0")
+
+    conn.execute('''CREATE TABLE IF NOT EXISTS qr_history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER,
+                    qr_type TEXT,
+                    content TEXT,
+                    created_at TEXT,
+                    FOREIGN KEY (user_id) REFERENCES users (id))''')
+
+    conn.execute('''CREATE TABLE IF NOT EXISTS favorites (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER,
+                    name TEXT,
+                    fg_color TEXT,
+                    bg_color TEXT,
+                    box_size INTEGER,
+                    border_size INTEGER,
+                    error_level TEXT,
+                    pattern TEXT,
+                    FOREIGN KEY (user_id) REFERENCES users (id))''')
+
+    conn.execute('''CREATE TABLE IF NOT EXISTS analytics (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER,
+                    qr_type TEXT,
+                    created_at TEXT,
+                    FOREIGN KEY (user_id) REFERENCES users (id))''')
+
+
+# Migration 2: indexes for the per-user history, analytics and favorites queries
+def migration_add_indexes(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_qr_history_user_created ON qr_history (user_id, created_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_analytics_user_type ON analytics (user_id, qr_type)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_analytics_user_created ON analytics (user_id, created_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_favorites_user_name ON favorites (user_id, name)")
+    # Give the query planner statistics for the new indexes
+    conn.execute("ANALYZE")
+
+
+# Migration 3: the highest id already exported from each table, for incremental exports
+def migration_export_watermarks(conn):
+    conn.execute('''CREATE TABLE IF NOT EXISTS export_watermarks (
+                    table_name TEXT PRIMARY KEY,
+                    last_id INTEGER,
+                    exported_at TEXT)''')
+
+
+# Migration 4: daily analytics counts per user and QR type, kept up to date by triggers
+# and backfilled from the existing analytics rows
+def migration_analytics_rollup(conn):
+    conn.execute('''CREATE TABLE IF NOT EXISTS analytics_daily (
+                    user_id INTEGER,
+                    day TEXT,
+                    qr_type TEXT,
+                    count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (user_id, day, qr_type))''')
+
+    conn.execute('''CREATE TRIGGER IF NOT EXISTS analytics_daily_insert AFTER INSERT ON analytics
+                    BEGIN
+                        INSERT INTO analytics_daily (user_id, day, qr_type, count)
+                        VALUES (NEW.user_id, date(NEW.created_at), NEW.qr_type, 1)
+                        ON CONFLICT (user_id, day, qr_type) DO UPDATE SET count = count + 1;
+                    END''')
+
+    conn.execute('''CREATE TRIGGER IF NOT EXISTS analytics_daily_delete AFTER DELETE ON analytics
+                    BEGIN
+                        UPDATE analytics_daily SET count = count - 1
+                        WHERE user_id = OLD.user_id AND day = date(OLD.created_at) AND qr_type = OLD.qr_type;
+                    END''')
+
+    conn.execute("DELETE FROM analytics_daily")
+    conn.execute('''INSERT INTO analytics_daily (user_id, day, qr_type, count)
+                    SELECT user_id, date(created_at), qr_type, COUNT(*) FROM analytics
+                    GROUP BY user_id, date(created_at), qr_type''')
+
+
+# Schema migrations in order; never reorder or edit one that has shipped, add a new one instead
+migrations = [
+    migration_initial_schema,
+    migration_add_indexes,
+    migration_export_watermarks,
+    migration_analytics_rollup
+]
+
+
+# Function to apply the connection pragmas
+def configure_connection(conn):
+    for pragma in connection_pragmas:
+        conn.execute(pragma)
+    return conn
+
+
+# Function to apply pending migrations (up to target, default all); returns the schema version
+def migrate(conn, target=None):
+    if target is None:
+        target = len(migrations)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    while version < target:
+        migration = migrations[version]
+        conn.execute("BEGIN")
+        try:
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {version + 1}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        version += 1
+    return version
+
+
+# Function to open the database with tuned settings and an up-to-date schema
+def open_database(db_path="user_data.db"):
+    conn = configure_connection(sqlite3.connect(db_path))
+    migrate(conn)
+    return conn
+
+
+# Function to fetch one page of a user's history, newest first, as (id, qr_type, content, created_at).
+# Keyset pagination: pass the (created_at, id) of the last row already shown as `after` to get the
+# next page. The (user_id, created_at) index makes every page cost the same, however deep it is.
+# Only the first preview_length characters of the content are returned.
+def fetch_history_page(conn, user_id, after=None, limit=100, preview_length=40):
+    if after is None:
+        return conn.execute('''SELECT id, qr_type, substr(content, 1, ?), created_at FROM qr_history
+                               WHERE user_id = ?
+                               ORDER BY created_at DESC, id DESC LIMIT ?''',
+                            (preview_length, user_id, limit)).fetchall()
+    return conn.execute('''SELECT id, qr_type, substr(content, 1, ?), created_at FROM qr_history
+                           WHERE user_id = ? AND (created_at, id) < (?, ?)
+                           ORDER BY created_at DESC, id DESC LIMIT ?''',
+                        (preview_length, user_id, after[0], after[1], limit)).fetchall()
+
+
+# Function to count a user's QR codes per type, most used first: [(qr_type, count)]
+def analytics_by_type(conn, user_id):
+    return conn.execute('''SELECT qr_type, SUM(count) as total FROM analytics_daily
+                           WHERE user_id = ? GROUP BY qr_type HAVING total > 0
+                           ORDER BY total DESC''', (user_id,)).fetchall()
+
+
+# Function to count a user's QR codes per day, newest first: [(day, count)].
+# first_day and last_day (YYYY-MM-DD) limit the range; limit caps the number of days.
+def analytics_by_day(conn, user_id, first_day=None, last_day=None, limit=None):
+    return conn.execute('''SELECT day, SUM(count) as total FROM analytics_daily
+                           WHERE user_id = ? AND day >= ? AND day <= ?
+                           GROUP BY day HAVING total > 0
+                           ORDER BY day DESC LIMIT ?''',
+                        (user_id, first_day or "", last_day or "9999-12-31", -1 if limit is None else limit)).fetchall()
+
+
+# Cached row counts: (connection id, table) -> (connection total_changes, highest rowid counted, count)
+row_count_cache = {}
+
+
+# Function to list the app's tables (SQLite's internal sqlite_* tables are skipped)
+def list_tables(conn):
+    return [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY rowid")
+            if not row[0].startswith("sqlite_")]
+
+
+# Function to get the column names of a table
+def table_columns(conn, table):
+    return [column[1] for column in conn.execute(f'PRAGMA table_info("{table}")')]
+
+
+# Function to fetch one page of a table in rowid order, starting after a rowid: rows of (rowid, *columns)
+def fetch_table_page(conn, table, after_rowid=0, limit=200):
+    return conn.execute(f'SELECT rowid, * FROM "{table}" WHERE rowid > ? ORDER BY rowid LIMIT ?',
+                        (after_rowid, limit)).fetchall()
+
+
+# Function to list the rowids of a table up to (and including) a rowid
+def fetch_rowids(conn, table, last_rowid):
+    return [row[0] for row in conn.execute(f'SELECT rowid FROM "{table}" WHERE rowid <= ?', (last_rowid,))]
+
+
+# Tables whose rows are updated or replaced in place, possibly by another connection: the
+# analytics_daily rollup (its triggers run on the background writer's connection) and the
+# export watermarks (moved by qr_export.py). All other tables only get rows appended by
+# other connections, and rows deleted through the main connection.
+in_place_tables = ("export_watermarks", "analytics_daily")
+
+
+# Function to count the rows of a table without rescanning it every time.
+# Other connections only append rows to the tables not in in_place_tables, so a cached
+# count is topped up with the rows past the highest rowid counted, which is a short rowid
+# range scan. Once this connection has changed anything, or for in_place_tables (which
+# are small), the table is counted again in full.
+def table_row_count(conn, table):
+    key = (id(conn), table)
+    cached = row_count_cache.get(key)
+    if cached is not None and cached[0] == conn.total_changes and table not in in_place_tables:
+        _, last_rowid, count = cached
+        added, new_last_rowid = conn.execute(f'SELECT COUNT(*), MAX(rowid) FROM "{table}" WHERE rowid > ?',
+                                             (last_rowid,)).fetchone()
+        count += added
+        last_rowid = new_last_rowid or last_rowid
+    else:
+        count, last_rowid = conn.execute(f'SELECT COUNT(*), MAX(rowid) FROM "{table}"').fetchone()
+        last_rowid = last_rowid or 0
+    row_count_cache[key] = (conn.total_changes, last_rowid, count)
+    return count
+
+
+# Tables that hold export bookkeeping or data derived from other tables
+export_skip_tables = ("export_watermarks", "analytics_daily")
+
+
+# Function to get the highest id of a table already exported incrementally (0 if never exported)
+def get_export_watermark(conn, table):
+    row = conn.execute("SELECT last_id FROM export_watermarks WHERE table_name = ?", (table,)).fetchone()
+    return row[0] if row else 0
+
+
+# Function to record the highest id of a table that has been exported
+def set_export_watermark(conn, table, last_id):
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO export_watermarks (table_name, last_id, exported_at) "
+                     "VALUES (?, ?, datetime('now'))", (table, last_id))
+
+
+# Function to stream the rows of a table with id above after_id into a CSV file (gzip-compressed
+# when compress is set). Tables without an id column (analytics_daily) are ordered by rowid
+# instead. Rows go from the cursor to the file batch_size at a time, so memory use does not
+# depend on the table size. Returns (rows written, highest id written); no file is written
+# when there are no rows and skip_empty is set.
+def export_table(conn, table, path, after_id=0, compress=False, batch_size=1000, skip_empty=False):
+    columns = table_columns(conn, table)
+    key = "id" if "id" in columns else "rowid"
+    rows_cursor = conn.execute(f'SELECT {key}, * FROM "{table}" WHERE {key} > ? ORDER BY {key}', (after_id,))
+    rows = rows_cursor.fetchmany(batch_size)
+    if not rows and skip_empty:
+        return 0, after_id
+
+    count = 0
+    last_id = after_id
+    opener = gzip.open if compress else open
+    try:
+        with opener(path, "wt", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)  # Write header
+            while rows:
+                writer.writerows(row[1:] for row in rows)
+                count += len(rows)
+                last_id = rows[-1][0]
+                rows = rows_cursor.fetchmany(batch_size)
+    except Exception:
+        # Do not leave a partial file behind
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    return count, last_id
+
+
+# Function to export tables to CSV files in a folder. A full export writes <table>.csv for
+# every table. An incremental export writes only rows with an id above the table's stored
+# watermark, to <table>_<first id>-<last id>.csv, and then moves the watermark, so its cost
+# depends on the number of new rows only. Returns a list of (table, file name, rows).
+def export_tables(conn, folder, tables=None, incremental=False, compress=False, batch_size=1000):
+    if tables is None:
+        tables = [table for table in list_tables(conn) if table not in export_skip_tables]
+    extension = ".csv.gz" if compress else ".csv"
+
+    exported = []
+    for table in tables:
+        if incremental:
+            after_id = get_export_watermark(conn, table)
+            # The range in the file name is filled in once the last id is known
+            path = os.path.join(folder, f"{table}_pending{extension}")
+            count, last_id = export_table(conn, table, path, after_id, compress, batch_size, skip_empty=True)
+            if not count:
+                continue
+            file_name = f"{table}_{after_id + 1}-{last_id}{extension}"
+            os.replace(path, os.path.join(folder, file_name))
+            set_export_watermark(conn, table, last_id)
+        else:
+            file_name = f"{table}{extension}"
+            count, _ = export_table(conn, table, os.path.join(folder, file_name), 0, compress, batch_size)
+        exported.append((table, file_name, count))
+    return exported
+
+
+# Queue of pending writes: (sql, params) tuples, threading.Event flush markers, or None to stop
+writer_queue = queue.Queue()
+writer_thread = None
+writer_settings = {
+    "db_path": "user_data.db",
+    "batch_size": 200,       # commit after this many rows...
+    "flush_interval": 0.5    # ...or this many seconds after the first pending row
+}
+writer_stats = {
+    "queued": 0,
+    "written": 0,
+    "failed": 0,
+    "transactions": 0,
+    "last_flush_ms": 0.0,
+    "max_flush_ms": 0.0,
+    "total_flush_ms": 0.0
+}
+writer_lock = threading.Lock()
+writer_exit_registered = False
+
+
+# Function to start the background writer thread (does nothing if it is already running)
+def start_writer(db_path="user_data.db", batch_size=200, flush_interval=0.5):
+    global writer_thread, writer_exit_registered
+    if writer_running():
+        return
+    writer_settings.update({"db_path": db_path, "batch_size": batch_size, "flush_interval": flush_interval})
+    writer_thread = threading.Thread(target=writer_loop, name="db-writer", daemon=True)
+    writer_thread.start()
+
+    # Make sure queued rows reach the disk even if the app exits without calling stop_writer
+    if not writer_exit_registered:
+        atexit.register(stop_writer)
+        writer_exit_registered = True
+
+
+# Function to check whether the writer thread is running
+def writer_running():
+    return writer_thread is not None and writer_thread.is_alive()
+
+
+# Function to queue an INSERT/UPDATE to be written in the background. If the writer thread
+# was never started or has died, the row (and anything left queued) is written right away.
+def queue_write(sql, params=()):
+    with writer_lock:
+        writer_stats["queued"] += 1
+    writer_queue.put((sql, params))
+    if not writer_running():
+        write_queued_now()
+
+
+# Function to wait until everything queued so far has been committed. Without a writer thread
+# the queue is written on this thread instead. Returns False if that did not happen in time
+# (or at all).
+def flush_writer(timeout=5.0):
+    if not writer_running():
+        return write_queued_now()
+    done = threading.Event()
+    writer_queue.put(done)
+    return done.wait(timeout)
+
+
+# Function to commit whatever is queued on this thread, on a connection of its own, for when
+# no writer thread is running. Returns False if the database could not be opened.
+def write_queued_now():
+    batch = []
+    waiters = []
+    while True:
+        try:
+            item = writer_queue.get_nowait()
+        except queue.Empty:
+            break
+        if isinstance(item, threading.Event):
+            waiters.append(item)
+        elif item is not None:
+            batch.append(item)
+
+    if batch:
+        try:
+            conn = configure_connection(sqlite3.connect(writer_settings["db_path"]))
+        except sqlite3.Error:
+            # Put the rows back so a later flush can still write them
+            for item in batch:
+                writer_queue.put(item)
+            return False
+        try:
+            commit_batch(conn, batch)
+        finally:
+            conn.close()
+    for waiter in waiters:
+        waiter.set()
+    return True
+
+
+# Function to flush pending writes and stop the writer thread
+def stop_writer(timeout=5.0):
+    global writer_thread
+    if writer_thread is None:
+        return
+    if writer_thread.is_alive():
+        writer_queue.put(None)
+        writer_thread.join(timeout)
+    writer_thread = None
+
+
+# Function to report writer statistics: queue depth and flush latency
+def writer_info():
+    with writer_lock:
+        info = dict(writer_stats)
+    info["queue_depth"] = writer_queue.qsize()
+    info["pending"] = info["queued"] - info["written"] - info["failed"]
+    info["avg_flush_ms"] = info["total_flush_ms"] / info["transactions"] if info["transactions"] else 0.0
+    info["running"] = writer_running()
+    return info
+
+
+# Function to write a batch of rows in one transaction
+def commit_batch(conn, batch):
+    if not batch:
+        return
+    start_time = time.perf_counter()
+    try:
+        with conn:
+            # Consecutive rows for the same statement go through one executemany call
+            for sql, rows in itertools.groupby(batch, key=lambda item: item[0]):
+                conn.executemany(sql, [params for _, params in rows])
+        written, failed = len(batch), 0
+    except sqlite3.Error:
+        # Fall back to one row at a time so a single bad row does not lose the whole batch
+        written, failed = 0, 0
+        for sql, params in batch:
+            try:
+                with conn:
+                    conn.execute(sql, params)
+                written += 1
+            except sqlite3.Error:
+                failed += 1
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+
+    with writer_lock:
+        writer_stats["written"] += written
+        writer_stats["failed"] += failed
+        writer_stats["transactions"] += 1
+        writer_stats["last_flush_ms"] = elapsed_ms
+        writer_stats["max_flush_ms"] = max(writer_stats["max_flush_ms"], elapsed_ms)
+        writer_stats["total_flush_ms"] += elapsed_ms
+
+
+# Writer thread: collect rows until the batch is full, the interval passes or a flush is asked for
+def writer_loop():
+    conn = configure_connection(sqlite3.connect(writer_settings["db_path"]))
+    batch_size = writer_settings["batch_size"]
+    flush_interval = writer_settings["flush_interval"]
+
+    stopping = False
+    while not stopping:
+        item = writer_queue.get()
+        batch = []
+        waiters = []
+        deadline = time.monotonic() + flush_interval
+        while True:
+            if item is None:
+                stopping = True
+                break
+            if isinstance(item, threading.Event):
+                waiters.append(item)
+                break
+            batch.append(item)
+            if len(batch) >= batch_size:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = writer_queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+
+        commit_batch(conn, batch)
+        for waiter in waiters:
+            waiter.set()
+
+    conn.close()
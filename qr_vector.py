@@ -0,0 +1,119 @@
+# Vector QR code output (SVG and EPS) drawn straight from the encoded module matrix.
+# Dark modules are merged before anything is written: runs of dark modules along each row,
+# then runs with the same columns on consecutive rows are stacked into one rectangle. A code
+# becomes a few hundred rectangles (one SVG path) instead of one shape per module, so files
+# stay small and print sharp at any size. Like qr_engine this module needs no GUI.
+from PIL import ImageColor
+
+from qr_engine import encode_matrix, resolve_style
+
+
+# Function to merge the dark modules of a matrix into rectangles: [(x, y, width, height)] in modules
+def dark_rectangles(matrix):
+    size = matrix.size
+    modules = matrix.modules
+    rectangles = []
+    growing = {}  # (first column, length) -> [x, y, width, height] of a rectangle still growing down
+
+    for y in range(size):
+        row = modules[y * size:(y + 1) * size]
+
+        # Runs of dark modules in this row
+        runs = set()
+        start = row.find(1)
+        while start != -1:
+            end = row.find(0, start)
+            if end == -1:
+                end = size
+            runs.add((start, end - start))
+            start = row.find(1, end)
+
+        # A rectangle ends when the row below does not continue it exactly
+        for run in [run for run in growing if run not in runs]:
+            rectangles.append(tuple(growing.pop(run)))
+        for run in runs:
+            if run in growing:
+                growing[run][3] += 1
+            else:
+                growing[run] = [run[0], y, run[1], 1]
+
+    rectangles.extend(tuple(rectangle) for rectangle in growing.values())
+    rectangles.sort(key=lambda rectangle: (rectangle[1], rectangle[0]))
+    return rectangles
+
+
+# Function to get everything a vector file needs: (settings, modules per side with border, rectangles).
+# Rectangles are moved in by the border, so they are in the coordinates of the whole image.
+def vector_layout(payload, style=None):
+    settings = resolve_style(style)
+    matrix = encode_matrix(payload, settings["error_level"])
+    border = settings["border"]
+    rectangles = [(x + border, y + border, width, height) for x, y, width, height in dark_rectangles(matrix)]
+    return settings, matrix.size + 2 * border, rectangles
+
+
+# Function to check whether a background color means no background at all
+def is_transparent(color):
+    return str(color).lower() == "transparent"
+
+
+# Function to render a payload as an SVG document (module_size is pixels per module; default: the style's box size)
+def render_svg(payload, style=None, module_size=None):
+    settings, modules, rectangles = vector_layout(payload, style)
+    pixels = modules * (module_size or settings["box_size"])
+    path = "".join(f"M{x} {y}h{width}v{height}h-{width}z" for x, y, width, height in rectangles)
+
+    lines = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{pixels}" height="{pixels}" '
+             f'viewBox="0 0 {modules} {modules}" shape-rendering="crispEdges">']
+    if not is_transparent(settings["bg"]):
+        lines.append(f'<rect width="{modules}" height="{modules}" fill="{settings["bg"]}"/>')
+    lines.append(f'<path fill="{settings["fg"]}" d="{path}"/>')
+    lines.append("</svg>")
+    return "\n".join(lines) + "\n"
+
+
+# Function to turn a color name or hex code into (red, green, blue) fractions from 0 to 1
+def color_fractions(color):
+    return tuple(channel / 255 for channel in ImageColor.getrgb(color)[:3])
+
+
+# Function to write a color as PostScript setrgbcolor operands
+def postscript_color(color):
+    return " ".join(f"{channel:.3f}" for channel in color_fractions(color))
+
+
+# Function to render a payload as an EPS document (module_size is points per module; default: the style's box size)
+def render_eps(payload, style=None, module_size=None):
+    settings, modules, rectangles = vector_layout(payload, style)
+    module_size = module_size or settings["box_size"]
+    points = modules * module_size
+
+    lines = [
+        "%!PS-Adobe-3.0 EPSF-3.0",
+        f"%%BoundingBox: 0 0 {points} {points}",
+        "%%Title: QR Code",
+        "%%EndComments",
+        "gsave",
+        f"{module_size} {module_size} scale"
+    ]
+    if not is_transparent(settings["bg"]):
+        lines.append(f"{postscript_color(settings['bg'])} setrgbcolor 0 0 {modules} {modules} rectfill")
+    lines.append(f"{postscript_color(settings['fg'])} setrgbcolor")
+    # PostScript counts y up from the bottom of the page
+    lines.extend(f"{x} {modules - y - height} {width} {height} rectfill" for x, y, width, height in rectangles)
+    lines.extend(["grestore", "showpage", "%%EOF"])
+    return "\n".join(lines) + "\n"
+
+
+# Vector formats: file extension and renderer
+vector_formats = {
+    "SVG": (".svg", render_svg),
+    "EPS": (".eps", render_eps)
+}
+
+
+# Function to write a payload to a vector file in one of vector_formats
+def save_vector(payload, path, format, style=None, module_size=None):
+    renderer = vector_formats[format.upper()][1]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(renderer(payload, style, module_size))